@@ -0,0 +1,153 @@
+"""
+Compare the size and load time of the json_cache in each store format
+
+Each format is built from the json_cache in a temporary directory:
+plain JSON files, gzipped JSON files, zip archives (stored, deflated and lzma)
+and a packed file. For each one, this reports the total size of its files,
+the space they use on disk, and the median time for a fresh interpreter to:
+- import dnd_character with DND_SRD_STORE set to it
+- open the store and load every document
+
+Usage:
+    python benchmarks/bench_compression.py [--runs 5] [--drop-caches] [--json]
+
+--drop-caches drops the OS page cache before each run, so files are read from
+disk (Linux only, needs root). Otherwise the files are usually already cached.
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT_DIR)
+
+from dnd_character.SRD import JSON_CACHE  # noqa: E402
+from dnd_character.srd_store import (  # noqa: E402
+    JsonCacheDirectory,
+    gzip_json_cache,
+    pack_json_cache,
+    zip_json_cache,
+)
+
+DROP_CACHES = "/proc/sys/vm/drop_caches"
+
+CHILD_IMPORT = """
+import json, time
+start = time.perf_counter()
+import dnd_character
+print(json.dumps(time.perf_counter() - start))
+"""
+
+CHILD_LOAD_ALL = """
+import json, sys, time
+start = time.perf_counter()
+from dnd_character.srd_store import open_store
+store = open_store(sys.argv[1])
+for uri in store:
+    store.load(uri)
+print(json.dumps(time.perf_counter() - start))
+"""
+
+
+def build_formats(workdir: str) -> dict[str, str]:
+    """Returns {format name: store location}"""
+    plain = os.path.join(workdir, "json")
+    os.mkdir(plain)
+    for filepath in JsonCacheDirectory(JSON_CACHE).files.values():
+        shutil.copy(filepath, os.path.join(plain, os.path.basename(filepath)))
+    formats = {"json files": plain}
+    formats["json.gz files"] = os.path.join(workdir, "gzip")
+    gzip_json_cache(plain, formats["json.gz files"])
+    for compression in ("stored", "deflated", "lzma"):
+        formats[f"zip ({compression})"] = os.path.join(workdir, f"{compression}.zip")
+        zip_json_cache(plain, formats[f"zip ({compression})"], compression)
+    formats["packed file"] = os.path.join(workdir, "srd.pack")
+    pack_json_cache(plain, formats["packed file"])
+    return formats
+
+
+def sizes(location: str) -> tuple[int, int]:
+    """Total size of the files at `location`, and the disk space they use"""
+    if os.path.isdir(location):
+        stats = [entry.stat() for entry in os.scandir(location) if entry.is_file()]
+    else:
+        stats = [os.stat(location)]
+    return (
+        sum(stat.st_size for stat in stats),
+        sum(stat.st_blocks * 512 for stat in stats),
+    )
+
+
+def run_child(code: str, location: str, drop_caches: bool) -> float:
+    if drop_caches:
+        subprocess.run(["sync"], check=True)
+        with open(DROP_CACHES, "w") as f:
+            f.write("3\n")
+    result = subprocess.run(
+        [sys.executable, "-c", code, location],
+        cwd=ROOT_DIR,
+        env={**os.environ, "DND_SRD_STORE": location},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def benchmark(runs: int, drop_caches: bool) -> dict:
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for name, location in build_formats(workdir).items():
+            size, disk_usage = sizes(location)
+            results[name] = {
+                "bytes": size,
+                "disk_bytes": disk_usage,
+                "import_seconds": statistics.median(
+                    run_child(CHILD_IMPORT, location, drop_caches) for _ in range(runs)
+                ),
+                "load_all_seconds": statistics.median(
+                    run_child(CHILD_LOAD_ALL, location, drop_caches)
+                    for _ in range(runs)
+                ),
+            }
+    return results
+
+
+def print_report(results: dict, runs: int) -> None:
+    print(f"median of {runs} runs")
+    print(
+        f"{'format':16} {'size KiB':>10} {'on disk KiB':>12}"
+        f" {'import ms':>10} {'load all ms':>12}"
+    )
+    for name, data in results.items():
+        print(
+            f"{name:16} {data['bytes'] / 1024:10.0f} {data['disk_bytes'] / 1024:12.0f}"
+            f" {data['import_seconds'] * 1000:10.1f}"
+            f" {data['load_all_seconds'] * 1000:12.1f}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "--drop-caches",
+        action="store_true",
+        help="drop the page cache before each run (Linux, needs root)",
+    )
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+    results = benchmark(args.runs, args.drop_caches)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_report(results, args.runs)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Benchmark generating characters with generate_characters
+
+For each number of workers, this measures the median time to generate
+--characters random characters (of every class, at levels 1 to 20)
+and checks that they are the same characters as with one worker.
+
+Usage:
+    python benchmarks/bench_generation.py [--runs 3] [--characters 2000]
+        [--workers 1 --workers 4]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from dnd_character.generation import generate_characters  # noqa: E402
+
+
+def generate(characters: int, workers: int) -> list[str]:
+    return [
+        str(character.uid)
+        for character in generate_characters(
+            characters, level=(1, 20), seed=0, workers=workers
+        )
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--characters", type=int, default=2000)
+    parser.add_argument("--workers", type=int, action="append")
+    args = parser.parse_args()
+    print(f"{args.characters} characters, median of {args.runs} runs")
+    print(f"{'workers':>7} {'seconds':>8} {'characters/s':>13}")
+    expected = None
+    for workers in args.workers or sorted({1, 2, os.cpu_count() or 1}):
+        times = []
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            uids = generate(args.characters, workers)
+            times.append(time.perf_counter() - start)
+        if expected is None:
+            expected = uids
+        assert uids == expected, "characters differ between numbers of workers"
+        seconds = statistics.median(times)
+        print(f"{workers:7} {seconds:8.2f} {args.characters / seconds:13.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+"""
+Benchmark the startup cost of `import dnd_character`
+
+Every measurement runs in a fresh interpreter and is repeated, reporting the median:
+- cold import: bytecode caches disabled, so every module is compiled
+- warm import: with bytecode caches
+- peak memory allocated during import (tracemalloc) and max RSS
+- time of each module of the package during a cold import, from
+  `python -X importtime`, and the memory it allocates (tracemalloc,
+  measured by an import hook), both on its own ("self") and including
+  the modules of the package it imports ("cumulative"). The memory of
+  a module includes the standard library modules it is first to import
+- time and memory to load each lazily created SRD global
+
+Usage:
+    python benchmarks/bench_import.py [--runs 10] [--json]
+
+Environment variables such as DND_SRD_STORE are passed to the measured interpreter.
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+# statements which load every document behind a lazily created SRD global
+SRD_GLOBALS = {
+    "SRD_rules": "from dnd_character.SRD import SRD_rules",
+    "SRD_equipment": (
+        "from dnd_character.equipment import SRD_equipment\n"
+        "list(SRD_equipment.values())"
+    ),
+    "SRD_monsters": (
+        "from dnd_character.monsters import SRD_monsters\n"
+        "list(SRD_monsters.values())"
+    ),
+    "SRD_spells": (
+        "from dnd_character.spellcasting import SRD_spells\n"
+        "list(SRD_spells.values())"
+    ),
+    "SPELLS": "from dnd_character.spellcasting import SPELLS\nlist(SPELLS.values())",
+    "spell_names_by_class": (
+        "from dnd_character.spellcasting import spell_names_by_class"
+    ),
+    "Character()": "from dnd_character import Wizard\nWizard(level=20)",
+}
+
+CHILD_IMPORT = """
+import json, resource, time, tracemalloc
+trace = {trace}
+if trace:
+    tracemalloc.start()
+start = time.perf_counter()
+import dnd_character
+elapsed = time.perf_counter() - start
+peak = tracemalloc.get_traced_memory()[1] if trace else 0
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({{"seconds": elapsed, "peak": peak, "rss": rss}}))
+"""
+
+# only `import dnd_character`, so that nothing it imports is already loaded
+CHILD_IMPORTTIME = """
+import dnd_character
+print("{}")
+"""
+
+# memory allocated while executing each module of the package, still allocated
+# when it is imported; nested imports are subtracted from "self"
+CHILD_MODULE_MEMORY = """
+import sys, tracemalloc
+from importlib.machinery import PathFinder
+memory = {}
+nested = []
+
+class TracingFinder:
+    @staticmethod
+    def find_spec(name, path=None, target=None):
+        if name.partition(".")[0] != "dnd_character":
+            return None
+        spec = PathFinder.find_spec(name, path, target)
+        if spec is None or spec.loader is None:
+            return spec
+        exec_module = spec.loader.exec_module
+
+        def traced_exec_module(module):
+            nested.append(0)
+            start = tracemalloc.get_traced_memory()[0]
+            try:
+                exec_module(module)
+            finally:
+                total = tracemalloc.get_traced_memory()[0] - start
+                memory[name] = (total - nested.pop(), total)
+                if nested:
+                    nested[-1] += total
+
+        spec.loader.exec_module = traced_exec_module
+        return spec
+
+sys.meta_path.insert(0, TracingFinder)
+tracemalloc.start()
+import dnd_character
+tracemalloc.stop()
+import json
+print(json.dumps(memory))
+"""
+
+CHILD_GLOBAL = """
+import json, time, tracemalloc
+import dnd_character
+code = {code!r}
+tracemalloc.start()
+start = time.perf_counter()
+exec(code)
+elapsed = time.perf_counter() - start
+peak = tracemalloc.get_traced_memory()[1]
+print(json.dumps({{"seconds": elapsed, "peak": peak}}))
+"""
+
+
+def run_child(code: str, *flags: str, bytecode: bool = True) -> tuple[dict, str]:
+    env = dict(os.environ)
+    if not bytecode:
+        env["PYTHONDONTWRITEBYTECODE"] = "1"
+        env["PYTHONPYCACHEPREFIX"] = os.devnull
+    result = subprocess.run(
+        [sys.executable, *flags, "-c", code],
+        cwd=ROOT_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.splitlines()[-1]), result.stderr
+
+
+def parse_importtime(stderr: str) -> dict[str, tuple[int, int]]:
+    """Returns {module of the package: (self microseconds, cumulative microseconds)}"""
+    times = {}
+    for line in stderr.splitlines():
+        match = re.match(r"import time:\s+(\d+) \|\s+(\d+) \|\s+(\S+)", line)
+        if match and match.group(3).partition(".")[0] == "dnd_character":
+            times[match.group(3)] = (int(match.group(1)), int(match.group(2)))
+    return times
+
+
+def benchmark(runs: int) -> dict:
+    results: dict = {"runs": runs, "import": {}, "modules": {}, "globals": {}}
+
+    cold, warm, peaks, rss = [], [], [], []
+    module_times: dict[str, list[tuple[int, int]]] = {}
+    module_memory: dict[str, list[tuple[int, int]]] = {}
+    for _ in range(runs):
+        cold.append(
+            run_child(CHILD_IMPORT.format(trace=False), bytecode=False)[0]["seconds"]
+        )
+        data = run_child(CHILD_IMPORT.format(trace=False))[0]
+        warm.append(data["seconds"])
+        rss.append(data["rss"])
+        peaks.append(run_child(CHILD_IMPORT.format(trace=True))[0]["peak"])
+        # the breakdown is measured in cold interpreters too
+        stderr = run_child(CHILD_IMPORTTIME, "-X", "importtime", bytecode=False)[1]
+        for module, times in parse_importtime(stderr).items():
+            module_times.setdefault(module, []).append(times)
+        memory = run_child(CHILD_MODULE_MEMORY, bytecode=False)[0]
+        for module, allocated in memory.items():
+            module_memory.setdefault(module, []).append(allocated)
+
+    results["import"] = {
+        "cold_seconds": statistics.median(cold),
+        "warm_seconds": statistics.median(warm),
+        "peak_bytes": statistics.median(peaks),
+        "max_rss_kb": statistics.median(rss),
+    }
+    for module, samples in module_times.items():
+        memory_samples = module_memory.get(module) or [(0, 0)]
+        results["modules"][module] = {
+            "self_seconds": statistics.median(s[0] for s in samples) / 1e6,
+            "cumulative_seconds": statistics.median(s[1] for s in samples) / 1e6,
+            "self_bytes": statistics.median(s[0] for s in memory_samples),
+            "cumulative_bytes": statistics.median(s[1] for s in memory_samples),
+        }
+
+    for name, code in SRD_GLOBALS.items():
+        samples = [run_child(CHILD_GLOBAL.format(code=code))[0] for _ in range(runs)]
+        results["globals"][name] = {
+            "seconds": statistics.median(s["seconds"] for s in samples),
+            "peak_bytes": statistics.median(s["peak"] for s in samples),
+        }
+    return results
+
+
+def print_report(results: dict) -> None:
+    imp = results["import"]
+    print(f"import dnd_character (median of {results['runs']} runs)")
+    print(f"  cold:        {imp['cold_seconds'] * 1000:8.1f} ms")
+    print(f"  warm:        {imp['warm_seconds'] * 1000:8.1f} ms")
+    print(f"  peak memory: {imp['peak_bytes'] / 1024:8.0f} KiB (tracemalloc)")
+    print(f"  max RSS:     {imp['max_rss_kb']:8.0f} KiB")
+    print()
+    print("each module during a cold import (self, and with the modules it imports)")
+    print(
+        f"{'module':32} {'self ms':>10} {'cumulative ms':>14}"
+        f" {'self KiB':>10} {'cumulative KiB':>15}"
+    )
+    for module, data in results["modules"].items():
+        print(
+            f"{module:32} {data['self_seconds'] * 1000:10.1f}"
+            f" {data['cumulative_seconds'] * 1000:14.1f}"
+            f" {data['self_bytes'] / 1024:10.0f}"
+            f" {data['cumulative_bytes'] / 1024:15.0f}"
+        )
+    print()
+    print(f"{'loading SRD global':32} {'ms':>10} {'peak KiB':>14}")
+    for name, data in sorted(
+        results["globals"].items(), key=lambda item: -item[1]["seconds"]
+    ):
+        print(
+            f"{name:32} {data['seconds'] * 1000:10.1f}"
+            f" {data['peak_bytes'] / 1024:14.0f}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+    results = benchmark(args.runs)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_report(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Benchmark backing up and restoring a roster as JSON Lines
+
+For --characters random characters (of every class, at levels 1 to 20),
+this measures the time and peak memory (with tracemalloc) to:
+- save them as one JSON array, then load it and construct every character
+- write them with write_characters, then read_characters (--compact writes
+  compact_dict instead of dict)
+The characters are generated one by one while they are saved, and only
+counted while they are loaded, as in a backup or a migration.
+
+Usage:
+    python benchmarks/bench_jsonl.py [--characters 5000] [--compact]
+        [--workers 1]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from dnd_character.character import Character  # noqa: E402
+from dnd_character.generation import generate_characters  # noqa: E402
+from dnd_character.jsonl import read_characters, write_characters  # noqa: E402
+
+
+def json_array(path: str, characters: int, compact: bool, workers: int) -> int:
+    roster = generate_characters(characters, level=(1, 20), seed=0, workers=1)
+    with open(path, "w") as file:
+        json.dump([dict(character) for character in roster], file)
+    with open(path) as file:
+        return sum(1 for _ in [Character(**data) for data in json.load(file)])
+
+
+def json_lines(path: str, characters: int, compact: bool, workers: int) -> int:
+    roster = generate_characters(characters, level=(1, 20), seed=0, workers=1)
+    write_characters(roster, path, compact)
+    return sum(1 for _ in read_characters(path, workers=workers))
+
+
+def measure(func, *args) -> tuple[float, float]:
+    tracemalloc.start()
+    start = time.perf_counter()
+    func(*args)
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return seconds, peak / 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--characters", type=int, default=5000)
+    parser.add_argument("--compact", action="store_true")
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+    print(f"{args.characters} characters saved and loaded")
+    print(f"{'format':<12} {'seconds':>8} {'peak MB':>8} {'file MB':>8}")
+    with tempfile.TemporaryDirectory() as directory:
+        for name, func in (("JSON array", json_array), ("JSON Lines", json_lines)):
+            path = os.path.join(directory, name)
+            seconds, peak = measure(
+                func, path, args.characters, args.compact, args.workers
+            )
+            size = os.path.getsize(path) / 1e6
+            print(f"{name:<12} {seconds:8.2f} {peak:8.1f} {size:8.1f}")
+
+
+if __name__ == "__main__":
+    main()
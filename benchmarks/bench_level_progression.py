@@ -0,0 +1,77 @@
+"""
+Benchmark levelling characters from 1 to 20
+
+For a level 1 character of each class, this measures the median time to:
+- award experience in small increments until level 20 (--xp per award)
+- set `level` directly to each level from 2 to 20
+- level down from 20 to 1, one level at a time
+
+Usage:
+    python benchmarks/bench_level_progression.py [--runs 5] [--xp 1000]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from dnd_character.classes import CLASSES  # noqa: E402
+from dnd_character.character import Character  # noqa: E402
+from dnd_character.experience import experience_at_level  # noqa: E402
+
+
+def award_experience(xp: int) -> None:
+    for classs in CLASSES.values():
+        character = Character(classs=classs)
+        while character.level < 20:
+            character.experience += xp
+
+
+def set_levels() -> None:
+    for classs in CLASSES.values():
+        character = Character(classs=classs)
+        for level in range(2, 21):
+            character.level = level
+
+
+def level_down() -> None:
+    for classs in CLASSES.values():
+        character = Character(classs=classs, level=20)
+        for level in range(19, 0, -1):
+            character.level = level
+
+
+def measure(func, runs: int, *args) -> float:
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func(*args)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) / len(CLASSES)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--xp", type=int, default=1000, help="experience per award")
+    args = parser.parse_args()
+    awards = -(-experience_at_level(20) // args.xp)
+    print(f"median of {args.runs} runs, per character")
+    print(
+        f"1 -> 20 by {awards} awards of {args.xp} XP:"
+        f" {measure(award_experience, args.runs, args.xp) * 1000:8.2f} ms"
+    )
+    print(
+        f"1 -> 20 by setting level:{' ' * 14}"
+        f" {measure(set_levels, args.runs) * 1000:8.2f} ms"
+    )
+    print(
+        f"20 -> 1 by setting level:{' ' * 14}"
+        f" {measure(level_down, args.runs) * 1000:8.2f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Benchmark changing and scanning the stats of characters in a Roster
+
+For --characters random characters (of every class, at levels 1 to 20),
+this measures the median time to:
+- compute the mean level
+- damage every character by 2d6
+with a Roster, and by looping over the Character objects.
+
+Usage:
+    python benchmarks/bench_roster.py [--runs 3] [--characters 10000]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from dnd_character.generation import generate_characters  # noqa: E402
+from dnd_character.roster import Roster  # noqa: E402
+
+
+def mean_level(characters: list) -> float:
+    return statistics.fmean(character.level for character in characters)
+
+
+def damage(characters: list) -> None:
+    for character in characters:
+        character.current_hp = max(
+            character.current_hp - random.randint(1, 6) - random.randint(1, 6), 0
+        )
+
+
+def median_time(func, runs: int) -> float:
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--characters", type=int, default=10000)
+    args = parser.parse_args()
+    characters = list(
+        generate_characters(args.characters, level=(1, 20), seed=0, workers=1)
+    )
+    roster = Roster(characters)
+    assert roster.mean("level") == mean_level(characters)
+    operations = {
+        "mean level": (
+            lambda: mean_level(characters),
+            lambda: roster.mean("level"),
+        ),
+        "damage 2d6": (lambda: damage(characters), lambda: roster.damage(d6=2)),
+    }
+    print(f"{args.characters} characters, median of {args.runs} runs")
+    print(f"{'operation':<12} {'objects (s)':>12} {'roster (s)':>11} {'speedup':>8}")
+    for name, (objects, columns) in operations.items():
+        objects_seconds = median_time(objects, args.runs)
+        roster_seconds = median_time(columns, args.runs)
+        print(
+            f"{name:<12} {objects_seconds:12.4f} {roster_seconds:11.4f}"
+            f" {objects_seconds / roster_seconds:7.1f}x"
+        )
+    start = time.perf_counter()
+    roster.characters()
+    print(f"writing the stats back: {time.perf_counter() - start:.4f} s")
+
+
+if __name__ == "__main__":
+    main()
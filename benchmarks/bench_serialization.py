@@ -0,0 +1,62 @@
+"""
+Benchmark serializing a roster of characters to JSON
+
+For --characters random characters (of every class, at levels 1 to 20),
+this measures the median time to serialize the whole roster with:
+- json.dumps(dict(character))
+- json.dumps(to_dict(character))
+- to_json(character)
+- json.dumps(compact_dict(character))
+and checks that the first three give the same JSON.
+
+Usage:
+    python benchmarks/bench_serialization.py [--runs 3] [--characters 10000]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from dnd_character.generation import generate_characters  # noqa: E402
+from dnd_character.serialization import compact_dict, to_dict, to_json  # noqa: E402
+
+SERIALIZERS = {
+    "json.dumps(dict)": lambda character: json.dumps(dict(character)),
+    "json.dumps(to_dict)": lambda character: json.dumps(to_dict(character)),
+    "to_json": to_json,
+    "json.dumps(compact_dict)": lambda character: json.dumps(compact_dict(character)),
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--characters", type=int, default=10000)
+    args = parser.parse_args()
+    roster = list(
+        generate_characters(args.characters, level=(1, 20), seed=0, workers=1)
+    )
+    expected = [json.dumps(dict(character)) for character in roster]
+    for name in ("json.dumps(to_dict)", "to_json"):
+        assert list(map(SERIALIZERS[name], roster)) == expected, name
+    print(f"{args.characters} characters, median of {args.runs} runs")
+    print(f"{'serializer':<25} {'seconds':>8} {'characters/s':>13} {'MB':>7}")
+    for name, serialize in SERIALIZERS.items():
+        times = []
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            size = sum(len(serialize(character)) for character in roster)
+            times.append(time.perf_counter() - start)
+        seconds = statistics.median(times)
+        print(
+            f"{name:<25} {seconds:8.2f} {args.characters / seconds:13.0f}"
+            f" {size / 1e6:7.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
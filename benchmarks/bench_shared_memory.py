@@ -0,0 +1,114 @@
+"""
+Measure the memory used by each worker of a process pool generating characters
+
+Compares two ways of giving the workers the SRD:
+- json_cache: each worker loads documents from the json_cache as it needs them
+- preloaded: the parent parses the whole SRD before starting the pool
+  (preload_srd), so forked workers inherit the parsed documents
+
+For each one this reports the median unique (private) memory of a worker,
+its proportional share of shared memory (PSS), and the time taken.
+Linux only, since memory is read from /proc/self/smaps_rollup.
+
+Usage:
+    python benchmarks/bench_shared_memory.py [--workers 4] [--characters 200]
+        [--start-method fork] [--all-documents]
+
+--all-documents makes each worker load every SRD document, instead of only
+the documents needed to create characters.
+"""
+import argparse
+import multiprocessing
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from dnd_character.SRD import SRD  # noqa: E402
+from dnd_character.classes import CLASSES  # noqa: E402
+from dnd_character.character import Character  # noqa: E402
+from dnd_character.srd_shared import preload_srd  # noqa: E402
+
+
+def memory_kb() -> dict[str, int]:
+    """Private and proportional memory of this process, in KiB"""
+    fields = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            name, _, value = line.partition(":")
+            if value.strip().endswith("kB"):
+                fields[name] = int(value.split()[0])
+    return {
+        "private": fields["Private_Clean"] + fields["Private_Dirty"],
+        "pss": fields["Pss"],
+    }
+
+
+def generate(i: int) -> tuple[int, dict[str, int]]:
+    classes = sorted(CLASSES)
+    Character(classs=CLASSES[classes[i % len(classes)]], level=1 + i % 20)
+    return os.getpid(), memory_kb()
+
+
+def load_everything(i: int) -> tuple[int, dict[str, int]]:
+    for uri in list(SRD.store):
+        SRD(uri)
+    return generate(i)
+
+
+def run(
+    mode: str, workers: int, characters: int, start_method: str, all_documents: bool
+) -> dict:
+    context = multiprocessing.get_context(start_method)
+    start = time.perf_counter()
+    if mode == "preloaded":
+        preload_srd()
+    with context.Pool(workers) as pool:
+        # the last measurement of each worker
+        memory = dict(
+            pool.map(
+                load_everything if all_documents else generate,
+                range(characters),
+                chunksize=1,
+            )
+        )
+    return {
+        "seconds": time.perf_counter() - start,
+        "private_kb": statistics.median(m["private"] for m in memory.values()),
+        "pss_kb": statistics.median(m["pss"] for m in memory.values()),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--characters", type=int, default=200)
+    parser.add_argument(
+        "--start-method",
+        choices=multiprocessing.get_all_start_methods(),
+        default="fork",
+    )
+    parser.add_argument("--mode", choices=["json_cache", "preloaded"], action="append")
+    parser.add_argument("--all-documents", action="store_true")
+    args = parser.parse_args()
+    print(f"{args.workers} workers, {args.characters} characters ({args.start_method})")
+    print(f"{'mode':12} {'private KiB':>12} {'PSS KiB':>10} {'seconds':>8}")
+    # preloading parses the whole SRD in this process, so it goes last
+    for mode in args.mode or ["json_cache", "preloaded"]:
+        result = run(
+            mode,
+            args.workers,
+            args.characters,
+            args.start_method,
+            args.all_documents,
+        )
+        print(
+            f"{mode:12} {result['private_kb']:12.0f} {result['pss_kb']:10.0f}"
+            f" {result['seconds']:8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
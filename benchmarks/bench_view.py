@@ -0,0 +1,63 @@
+"""
+Benchmark reading saved characters with CharacterView
+
+For --characters random characters (of every class, at levels 1 to 20),
+saved as JSON, this measures the median time to read their name,
+current_hp and level from:
+- Character(**data)
+- CharacterView(data)
+
+Usage:
+    python benchmarks/bench_view.py [--runs 3] [--characters 10000]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from dnd_character.character import Character  # noqa: E402
+from dnd_character.generation import generate_characters  # noqa: E402
+from dnd_character.view import CharacterView  # noqa: E402
+
+
+def read(load, rows: list[dict]) -> list[tuple]:
+    return [
+        (character.name, character.current_hp, character.level)
+        for character in map(load, rows)
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--characters", type=int, default=10000)
+    args = parser.parse_args()
+    rows = [
+        json.loads(json.dumps(dict(character)))
+        for character in generate_characters(
+            args.characters, level=(1, 20), seed=0, workers=1
+        )
+    ]
+    loaders = {
+        "Character(**data)": lambda data: Character(**data),
+        "CharacterView": CharacterView,
+    }
+    assert read(loaders["Character(**data)"], rows) == read(CharacterView, rows)
+    print(f"{args.characters} characters, median of {args.runs} runs")
+    print(f"{'loader':<18} {'seconds':>8} {'characters/s':>13}")
+    for name, load in loaders.items():
+        times = []
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            read(load, rows)
+            times.append(time.perf_counter() - start)
+        seconds = statistics.median(times)
+        print(f"{name:<18} {seconds:8.3f} {args.characters / seconds:13.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,42 @@
 """
 SRD() is a cached function that gets SRD data from a DND 5e REST API
 This module has the SRD index `SRD_endpoints`
-and some other SRD_ globals containing rules and class data
+and some other SRD_ globals containing rules and class data.
+SRD_rules and the SRDIndex dicts in other modules are loaded when first used.
 
 Environment variables:
     DND_LOGGING=WARNING
     DND_SRD_API=http://dnd5eapi.co
+    DND_SRD_EAGER=0 (set to 1 to parse the whole JSON cache on import)
+    DND_SRD_STORE=path/to/json_cache (a directory, a zip archive, an SQLite database,
+        a packed file, or :memory: to keep API responses in memory instead of
+        writing them to the json_cache)
+    DND_SRD_CACHE_SIZE=0 (maximum number of documents in SRD.cache; 0 is unlimited)
+    DND_SRD_CACHE_BYTES=0 (approximate maximum bytes in SRD.cache; 0 is unlimited)
+
+The limits only apply to SRD.cache, the documents returned by SRD(). Objects
+built from documents are cached separately and never evicted: the values of
+SRDIndex dicts (e.g. SPELLS), the lru_caches of srd_graph, templates and
+spellcasting, and the JSON of SRD_JSON and SRD_DIGESTS in serialization.
+They may keep documents evicted from SRD.cache alive.
 """
-import json
-from os import environ, walk, path, remove, mkdir
+from os import environ, path, mkdir
 import logging
-from typing import Callable, TypeAlias, Union
+import sys
+import threading
+from collections import OrderedDict, namedtuple
+from concurrent.futures import Future
+from collections.abc import Mapping, MutableMapping
+from functools import lru_cache
+from typing import Any, Callable, Iterator, Optional, TypeAlias, Union
+from .srd_store import (
+    JSON_CACHE,
+    SRDStore,
+    JsonCacheDirectory,
+    open_store,
+    find_zip_archive,
+    load_snapshot,
+)
 
 try:
     import requests
@@ -37,8 +63,8 @@ LOG = make_log(environ.get("DND_LOGGING", "WARNING"))
 
 
 try:
-    JSON_CACHE = path.join(path.dirname(path.abspath(__file__)), "json_cache")
-    if not path.exists(JSON_CACHE):
+    # inside a zipapp, the json_cache is read from the archive instead
+    if not path.exists(JSON_CACHE) and find_zip_archive(JSON_CACHE) is None:
         LOG.info(f"Creating directory {JSON_CACHE}")
         mkdir(JSON_CACHE)
 
@@ -46,62 +72,237 @@ except Exception as e:
     LOG.error(f"Entire JSON cache failed to load: {str(e)}")
 
 
+CacheInfo = namedtuple(
+    "CacheInfo",
+    ["hits", "misses", "evictions", "maxsize", "currsize", "maxbytes", "nbytes"],
+)
+
+
+def approximate_size(data: JsonValues) -> int:
+    """Approximate memory used by a parsed JSON document, in bytes"""
+    size = sys.getsizeof(data)
+    if isinstance(data, dict):
+        for key, value in data.items():
+            size += sys.getsizeof(key) + approximate_size(value)
+    elif isinstance(data, list):
+        for value in data:
+            size += approximate_size(value)
+    return size
+
+
+class LRUCache(MutableMapping):
+    """
+    Holds parsed SRD documents in memory. When there are more than `maxsize`
+    documents, or more than roughly `maxbytes` bytes of them, the least recently
+    used documents are evicted (to be loaded from the store again if needed).
+    Both limits are optional. Reads don't lock; writes hold a lock.
+    """
+
+    def __init__(self, maxsize: Optional[int] = None, maxbytes: Optional[int] = None):
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.nbytes = 0
+        self._data: OrderedDict[str, JsonData] = OrderedDict()
+        self._sizes: dict[str, int] = {}
+
+    def __getitem__(self, uri: str) -> JsonData:
+        try:
+            value = self._data[uri]
+        except KeyError:
+            self.misses += 1
+            raise
+        self.hits += 1
+        if self.maxsize is not None or self.maxbytes is not None:
+            try:
+                self._data.move_to_end(uri)
+            except KeyError:
+                pass  # evicted by another thread
+        return value
+
+    def __setitem__(self, uri: str, value: JsonData) -> None:
+        size = approximate_size(value) if self.maxbytes is not None else 0
+        with self._lock:
+            self._remove(uri)
+            self._data[uri] = value
+            self._sizes[uri] = size
+            self.nbytes += size
+            while (self.maxsize is not None and len(self._data) > self.maxsize) or (
+                self.maxbytes is not None
+                and self.nbytes > self.maxbytes
+                and len(self._data) > 1
+            ):
+                evicted, _ = self._data.popitem(last=False)
+                self.nbytes -= self._sizes.pop(evicted, 0)
+                self.evictions += 1
+
+    def __delitem__(self, uri: str) -> None:
+        with self._lock:
+            if not self._remove(uri):
+                raise KeyError(uri)
+
+    def _remove(self, uri: str) -> bool:
+        if self._data.pop(uri, None) is None:
+            return False
+        self.nbytes -= self._sizes.pop(uri, 0)
+        return True
+
+    def __contains__(self, uri: object) -> bool:
+        return uri in self._data
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def cache_info(self) -> CacheInfo:
+        return CacheInfo(
+            self.hits,
+            self.misses,
+            self.evictions,
+            self.maxsize,
+            len(self._data),
+            self.maxbytes,
+            self.nbytes,
+        )
+
+
 class DecoratedAPICallable:
     """
     Instantiated by the @cached_json decorator to wrap API calls.
+    Calling this object returns the document for a uri: first from memory,
+    then from the `store` (parsed on first use), and finally from the API.
+
+    It is safe to share between threads. Cache hits don't lock, and when several
+    threads miss on the same uri, only one loads it while the others wait.
     """
 
-    def __init__(self, func: Callable[[str], JsonData]):
+    def __init__(
+        self,
+        func: Callable[[str], JsonData],
+        store: SRDStore,
+        cache: Optional[LRUCache] = None,
+    ):
         self.func = func
-        self.cache: dict[str, JsonData] = {}
+        self.store = store
+        self.cache = LRUCache() if cache is None else cache
+        self._lock = threading.Lock()
+        self._in_flight: dict[str, Future] = {}
 
     def __call__(self, uri: str) -> JsonData:
-        return self.func(uri)
+        try:
+            return self.cache[uri]
+        except KeyError:
+            pass
 
+        with self._lock:
+            # another thread may have loaded it since the cache was checked
+            if uri in self.cache:
+                try:
+                    return self.cache[uri]
+                except KeyError:
+                    pass  # evicted since
+            future = self._in_flight.get(uri)
+            waiting = future is not None
+            if not waiting:
+                future = self._in_flight[uri] = Future()
+        if waiting:
+            # another thread is already loading this uri
+            return future.result()
 
-def cached_json(func: Callable[[str], JsonData]) -> Callable[[str], JsonData]:
-    """
-    This decorator returns a DecoratedAPICallable, which will return cached data
-    if it exists. If it does not exist, then it will send a GET request to the API
-    and try to save the response to a local JSON file to prevent future requests.
-    """
-    func = DecoratedAPICallable(func)
-    for dirname, __, files in walk(JSON_CACHE):
-        for fp in files:
-            if path.splitext(fp)[1] != ".json":
+        try:
+            result = self.load(uri)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+        finally:
+            with self._lock:
+                del self._in_flight[uri]
+        return result
+
+    def load(self, uri: str) -> JsonData:
+        """Load a document from the store, or from the API if it isn't stored"""
+        try:
+            result = self.store.load(uri)
+        except KeyError:
+            LOG.debug(f"Uncached URI: {uri}")
+            result = self.func(uri)
+            if not self.store.readonly:
+                self.store.save(uri, result)
+        self.cache[uri] = result
+        return result
+
+    def cache_info(self) -> CacheInfo:
+        """Hits, misses and evictions of the in-memory cache, like functools.lru_cache"""
+        return self.cache.cache_info()
+
+    def load_all(self) -> None:
+        """
+        Parse every document in the store now, instead of the first time it is needed.
+        Useful for warming up a process before it serves requests.
+        (If the cache is bounded, only the most recently loaded documents are kept.)
+        """
+        if self.load_snapshot():
+            return
+        for uri in list(self.store):
+            if uri in self.cache:
                 continue
             try:
-                with open(f"{dirname}/{fp}", "r") as f:
-                    data = json.load(f)
-                func.cache[f"/{fp.replace('_', '/')[:-5]}"] = data
-            except json.decoder.JSONDecodeError as e:
-                LOG.error(f"{fp} failed to load: {str(e)}")
-                remove(f"{dirname}/{fp}")
-
-    def outer_wrapper(
-        func: DecoratedAPICallable,
-    ) -> Callable[[str], JsonData]:
-        def inner_wrapper(uri: str) -> JsonData:
-            try:
-                return func.cache[uri]
+                self.cache[uri] = self.store.load(uri)
             except KeyError:
-                LOG.debug(f"Uncached URI: {uri}")
-                func.cache[uri] = result = func(uri)
-                fp = f"{JSON_CACHE}/{uri[1:].replace('/', '_')}.json"
-                with open(fp, "w") as f:
-                    f.write(json.dumps(result))
-                return result
+                continue
 
-        return inner_wrapper
+    def load_snapshot(self) -> bool:
+        """
+        Load every document from the snapshot of the json_cache (see `build_snapshot`)
+        Returns False if there is no snapshot, or it doesn't match the JSON files.
+        """
+        if not isinstance(self.store, JsonCacheDirectory):
+            return False
+        documents = load_snapshot(self.store.directory)
+        if documents is None:
+            return False
+        for uri, data in documents.items():
+            if uri not in self.cache:
+                self.cache[uri] = data
+        return True
+
+
+def cached_json(func: Callable[[str], JsonData]) -> DecoratedAPICallable:
+    """
+    This decorator returns a DecoratedAPICallable, which will return cached data
+    if it exists. If it does not exist, then it will send a GET request to the API
+    and try to save the response to a local JSON file to prevent future requests.
 
-    return outer_wrapper(func)
+    Only the index of the JSON cache is read here; each file is parsed the first
+    time its uri is requested. Set DND_SRD_EAGER=1 to parse everything up front
+    (from the snapshot of the JSON cache, if it exists and is up to date).
+    """
+    maxsize = int(environ.get("DND_SRD_CACHE_SIZE", 0))
+    maxbytes = int(environ.get("DND_SRD_CACHE_BYTES", 0))
+    func = DecoratedAPICallable(
+        func,
+        open_store(environ.get("DND_SRD_STORE") or JSON_CACHE),
+        LRUCache(maxsize or None, maxbytes or None),
+    )
+    if environ.get("DND_SRD_EAGER", "0") not in ("", "0"):
+        func.load_all()
+    return func
 
 
-def __SRD_API_CALL() -> Callable[[str], JsonData]:
+def __SRD_API_CALL() -> DecoratedAPICallable:
     """
     Closure for API calls
     """
     SRD_API = environ.get("DND_SRD_API", "http://dnd5eapi.co")
+    # reuse connections between live API calls
+    session = requests.Session() if requests is not None else None
 
     @cached_json
     def get_from_SRD(uri: str) -> JsonData:
@@ -112,7 +313,7 @@ def __SRD_API_CALL() -> Callable[[str], JsonData]:
 
         LOG.warning(f"Live API request! {str(uri)}")
 
-        return requests.get(f"{SRD_API}{uri}").json()
+        return session.get(f"{SRD_API}{uri}").json()
 
     return get_from_SRD
 
@@ -120,6 +321,54 @@ def __SRD_API_CALL() -> Callable[[str], JsonData]:
 SRD = __SRD_API_CALL()
 
 SRD_endpoints = SRD("/api/")
+
+
+class SRDIndex(Mapping):
+    """
+    A read-only dict of every document from an SRD endpoint (e.g. "monsters"),
+    keyed by index. Nothing is loaded until it is used, and then only the
+    documents which are accessed. `factory` converts a document into its value.
+    """
+
+    def __init__(
+        self, endpoint: str, factory: Optional[Callable[[JsonData], Any]] = None
+    ):
+        self.endpoint = endpoint
+        self.factory = factory
+        self._urls: Optional[dict[str, str]] = None
+        self._values: dict[str, Any] = {}
+
+    @property
+    def urls(self) -> dict[str, str]:
+        if self._urls is None:
+            self._urls = {
+                result["index"]: result["url"]
+                for result in SRD(SRD_endpoints[self.endpoint])["results"]
+            }
+        return self._urls
+
+    def __getitem__(self, index: str) -> Any:
+        if self.factory is None:
+            return SRD(self.urls[index])
+        try:
+            return self._values[index]
+        except KeyError:
+            value = self._values[index] = self.factory(SRD(self.urls[index]))
+            return value
+
+    def __contains__(self, index: object) -> bool:
+        return index in self.urls
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.urls)
+
+    def __len__(self) -> int:
+        return len(self.urls)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.endpoint!r})"
+
+
 SRD_classes = {}
 SRD_class_levels = {}
 
@@ -127,10 +376,20 @@ for result in SRD(SRD_endpoints["classes"])["results"]:
     SRD_classes[result["index"]] = SRD(result["url"])
     SRD_class_levels[result["index"]] = SRD(result["url"] + "/levels")
 
-SRD_rules = {
-    category["name"]: {
-        subsection["name"]: SRD(subsection["url"])["desc"]
-        for subsection in SRD(category["url"])["subsections"]
+
+@lru_cache(maxsize=None)
+def get_SRD_rules() -> dict[str, dict[str, str]]:
+    return {
+        category["name"]: {
+            subsection["name"]: SRD(subsection["url"])["desc"]
+            for subsection in SRD(category["url"])["subsections"]
+        }
+        for category in SRD(SRD_endpoints["rules"])["results"]
     }
-    for category in SRD(SRD_endpoints["rules"])["results"]
-}
+
+
+def __getattr__(name: str) -> Any:
+    # SRD_rules is only loaded when it is first used
+    if name == "SRD_rules":
+        return get_SRD_rules()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
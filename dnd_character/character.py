@@ -1,4 +1,5 @@
-from typing import Optional, Union, Iterator, TYPE_CHECKING
+from dataclasses import is_dataclass
+from typing import Any, Callable, Iterable, Optional, Union, Iterator, TYPE_CHECKING
 from uuid import uuid4, UUID
 import logging
 
@@ -6,23 +7,76 @@ if TYPE_CHECKING:
     from .classes import _CLASS
     from .spellcasting import _SPELL
 
-from .SRD import SRD, SRD_class_levels
-from .equipment import _Item, Item
+from .SRD import SRD_class_levels
+from .equipment import _Item
 from .experience import Experience, experience_at_level, level_at_experience
 from .spellcasting import SpellList
 from .dice import sum_rolls
 from .features import get_class_features_data
+from .templates import class_template, level_template
 
 
 LOG = logging.getLogger(__package__)
 
 coin_value = {"pp": 10, "gp": 1, "ep": 0.5, "sp": 0.1, "cp": 0.01}
 
+CONDITIONS = (
+    "blinded",
+    "charmed",
+    "deafened",
+    "frightened",
+    "grappled",
+    "incapacitated",
+    "invisible",
+    "paralyzed",
+    "petrified",
+    "poisoned",
+    "prone",
+    "restrained",
+    "stunned",
+    "unconscious",
+)
+
+# keys of dict(character) whose values are stored in private attrs, in order
+SERIALIZED_PROPERTIES = (
+    "experience",
+    "death_saves",
+    "death_fails",
+    "dexterity",
+    "dead",
+    "current_hp",
+    "inventory",
+    "cantrips_known",
+    "spells_known",
+    "spells_prepared",
+)
+
 
 class InvalidParameterError(Exception):
     pass
 
 
+def as_is(value: Any) -> Any:
+    return value
+
+
+def same_value(value: Any, other: Any) -> bool:
+    """value == other, where items and spells in lists are also equal to their dicts"""
+    if value is other or value == other:
+        return True
+    if type(value) is not list or type(other) is not list or len(value) != len(other):
+        return False
+    return all(
+        obj == other_obj or as_dict(obj) == as_dict(other_obj)
+        for obj, other_obj in zip(value, other)
+    )
+
+
+def as_dict(obj: Any) -> Any:
+    """An item or spell as a dict (without copying its values), or obj itself"""
+    return serialization.shallow_dict(obj) if is_dataclass(obj) else obj
+
+
 class Character:
     """
     Character object deals with all aspects of a player character including
@@ -107,6 +161,11 @@ class Character:
                 intelligence (int):  character's starting intelligence
                 charisma     (int):  character's starting charisma
         """
+        # keys of dict(self) marked as changed since the last call to clear_changes
+        self._changed: set[str] = set()
+        # attrs at the last call to clear_changes
+        self._saved_attrs: dict[str, Any] = {}
+
         # Decorative attrs that don't affect program logic
         self.uid: UUID = (
             uuid4() if uid is None else uid if isinstance(uid, UUID) else UUID(uid)
@@ -147,6 +206,8 @@ class Character:
             [] if class_index not in SRD_class_levels else SRD_class_levels[class_index]
         )
         self._level = 1  # may be increased later in this method
+        # highest level whose class features have been added to class_features
+        self._class_features_level = 0
         self.prof_bonus = prof_bonus
         self.ability_score_bonus = ability_score_bonus
         self.class_features = class_features if class_features is not None else {}
@@ -178,28 +239,42 @@ class Character:
         self._spells_prepared: SpellList["_SPELL"] = SpellList(spells_prepared)
         self.set_spell_slots(spell_slots)
 
-        # Experience points
-        # self.level could be altered by Experience object below
+        # Experience points and levels
+        # The level is set here without applying the class levels at each step:
+        # the classs.setter below applies them once, for the final level
         if experience is None:
             experience = 0
-        self._experience = Experience(character=self, experience=int(experience))
-
-        # Levels
-        # self.level could be altered by Experience object above
+        self._experience = Experience(
+            character=self, experience=int(experience), update_level=False
+        )
+        self._level = level_at_experience(self._experience._experience)
+        self._update_hit_points()
+        custom_level = None
         if level is not None:
-            if self._experience.experience == 0:
+            if self._experience._experience == 0:
                 # if only level is specified, set the experience to the amount for that level
                 self._experience._experience = experience_at_level(level)
-                self._experience.update_level()
-                # Experience alters self.level so it is now the correct value
+                self._level = level_at_experience(self._experience._experience)
+                self._update_hit_points()
             else:
                 # if level is specified AND experience is not zero:
-                # the Experience object normally handles the self.level attr
+                # the experience normally determines the level
                 # but if a user changes their level manually, it should override this anyway
                 LOG.info(
                     f"Custom level for {str(self.name)}: {str(level)} instead of {str(self.level)}"
                 )
-                self._level = level
+                custom_level = level
+
+        # The class levels of class_index are only applied here if the classs.setter
+        # won't apply the same class levels up to at least the current level
+        if self._class_levels and (
+            classs is None
+            or getattr(classs, "index", None) != class_index
+            or (custom_level is not None and custom_level < self._level)
+        ):
+            self.apply_class_level()
+        if custom_level is not None:
+            self._level = custom_level
 
         if skills_charisma is None:
             self.skills_charisma = {
@@ -284,38 +359,23 @@ class Character:
         self.exhaustion = exhaustion
 
         if self.level == level_at_experience(self._experience._experience):
-            self.level = self._level
+            # the class levels are already applied, only the hit die may have changed
+            self._update_hit_points()
             if current_hp is None:
                 # Set character's HP to the maximum for their level,
                 # only if the level isn't custom! (if it matches experience points according to SRD)
-                self.current_hp = Character.get_maximum_hp(
-                    self.hd, self.level, self.constitution
-                )
+                self.current_hp = self.max_hp
 
         # Conditions
-        all_conditions = [
-            "blinded",
-            "charmed",
-            "deafened",
-            "frightened",
-            "grappled",
-            "incapacitated",
-            "invisible",
-            "paralyzed",
-            "petrified",
-            "poisoned",
-            "prone",
-            "restrained",
-            "stunned",
-            "unconscious",
-        ]
         if conditions is None:
-            self.conditions = {k: False for k in all_conditions}
+            self.conditions = {k: False for k in CONDITIONS}
         else:
             self.conditions = {
                 k: conditions[k] if k in conditions.keys() else False
-                for k in all_conditions
+                for k in CONDITIONS
             }
+        # a new character is unchanged
+        self.clear_changes()
 
     def __str__(self) -> str:
         return (
@@ -329,60 +389,102 @@ class Character:
             f"Current Experience: {str(self.experience)}\n"
             f"EXP to next Level: {str(self.experience.to_next_level)}\n\n"
             f"Proficiencies:\n{', '.join([value['name'] for value in self.proficiencies.values()])}\n\n"
-            f"Inventory:\n{', '.join([item.name for item in self.inventory])}\n\n"
+            f"Inventory:\n{', '.join([item.name for item in self._inventory])}\n\n"
             f"Class Features:\n{', '.join([item['name'] for item in self.class_features.values()])}\n\n"
         )
 
+    def __getstate__(self) -> dict[str, Any]:
+        # the SRD class levels are shared by every character of a class, which
+        # is how level ups find the cached templates: they're not pickled,
+        # and the character is linked to them again when unpickled
+        state = self.__dict__.copy()
+        if state["_class_levels"] is SRD_class_levels.get(self.class_index):
+            del state["_class_levels"]
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        if "_class_levels" not in state:
+            state["_class_levels"] = SRD_class_levels[state["class_index"]]
+        self.__dict__.update(state)
+
     def __iter__(self) -> Iterator[tuple[str, Union[dict, list, int, str, bool, None]]]:
         """
         Enables `dict(self)` to return a dictionary representation of this object.
         Iterate over this object to get (key, value) pairs.
 
         Attrs starting with _ are skipped, as we assume they are non-serializable.
-        Such attrs must be added manually to the functions in this method.
+        Such attrs must be added manually to `_iter_fields`.
         """
+        return self._iter_fields(dict)
 
-        def keys() -> list[str]:
-            keys = [key for key in self.__dict__ if not key.startswith("_")]
-            keys.extend(
-                [
-                    "experience",
-                    "death_saves",
-                    "death_fails",
-                    "dexterity",
-                    "dead",
-                    "current_hp",
-                    "inventory",
-                    "cantrips_known",
-                    "spells_known",
-                    "spells_prepared",
-                ]
-            )
-            return keys
-
-        def values() -> list[Union[dict, list, int, str, bool, None]]:
-            vals = [
-                value if key != "uid" else str(value)
-                for key, value in self.__dict__.items()
-                if not key.startswith("_")
-            ]
-            vals.extend(
-                [
-                    self._experience._experience,
-                    self._death_saves,
-                    self._death_fails,
-                    self._dexterity,
-                    self._dead,
-                    self._current_hp,
-                    [dict(item) for item in self._inventory],
-                    [dict(spell) for spell in self._cantrips_known],
-                    [dict(spell) for spell in self._spells_known],
-                    [dict(spell) for spell in self._spells_prepared],
-                ]
+    def _iter_fields(
+        self, to_dict: Callable[[Any], dict]
+    ) -> Iterator[tuple[str, Union[dict, list, int, str, bool, None]]]:
+        """
+        (key, value) pairs of `__iter__`, where `to_dict` converts
+        each item and spell to a dict
+        """
+        for key, value in self.__dict__.items():
+            if not key.startswith("_"):
+                yield key, value if key != "uid" else str(value)
+        for key in SERIALIZED_PROPERTIES:
+            yield key, self._field(key, to_dict)
+
+    def _field(self, key: str, to_dict: Callable[[Any], dict] = dict) -> Any:
+        """The value of `key` in dict(self)"""
+        if key in ("inventory", "cantrips_known", "spells_known", "spells_prepared"):
+            return [to_dict(value) for value in self.__dict__["_" + key]]
+        if key == "experience":
+            return self._experience._experience
+        if key in SERIALIZED_PROPERTIES:
+            return self.__dict__["_" + key]
+        value = self.__dict__[key]
+        return value if key != "uid" else str(value)
+
+    def mark_changed(self, *keys: str) -> None:
+        """
+        Mark keys of dict(self) as changed. Assigning attrs and properties,
+        and the methods of this class, are tracked already, but changing
+        a dict or list in place (e.g. `character.conditions["prone"] = True`)
+        must be marked with this
+        """
+        self._changed.update(keys)
+
+    @property
+    def changed(self) -> set[str]:
+        """Keys of dict(self) changed since this character was created or cleared"""
+        saved = self._saved_attrs
+        changed = {
+            key
+            for key, value in self.__dict__.items()
+            if not key.startswith("_")
+            and (
+                key in self._changed
+                or key not in saved
+                or (value is not saved[key] and value != saved[key])
             )
-            return vals
+        }
+        changed.update(key for key in self._changed if key in SERIALIZED_PROPERTIES)
+        return changed
+
+    def clear_changes(self) -> None:
+        """Forget the changes, e.g. after saving them"""
+        self._changed.clear()
+        # only the public attrs are compared, and copying the private ones
+        # would keep the previous snapshot in this one
+        self._saved_attrs = {
+            key: value for key, value in self.__dict__.items() if key[0] != "_"
+        }
 
-        return zip(keys(), values())
+    def patch(self) -> dict[str, Any]:
+        """
+        The changed keys of dict(self) with their new values, which turn a saved
+        dict(self) into the current one with `serialization.apply_patch`
+        """
+        changed = self.changed
+        keys = [key for key in self.__dict__ if key in changed]
+        keys += [key for key in SERIALIZED_PROPERTIES if key in changed]
+        return {key: self._field(key) for key in keys}
 
     def __repr__(self) -> str:
         """Returns a string that could be copy-pasted to create a new instance of this object"""
@@ -395,12 +497,51 @@ class Character:
         Check if `other` is an identical character to `self`
         Or if `other` is a dict that would construct an identical character
         """
+        if other is self:
+            return True
         if type(other) is dict:
+            # a dict equal to dict(self) constructs an identical character,
+            # unless the level is custom (it isn't saved in the dict)
+            if (
+                self._level == level_at_experience(self._experience._experience)
+                and len(other) == self._fields_count()
+                and self._same_fields(other.items())
+            ):
+                return True
             other = Character(**other)
         if not isinstance(other, type(self)):
-            return False
-        for pair1, pair2 in zip(self, other):
-            if pair1 != pair2:
+            # e.g. a CharacterView, which compares itself with characters
+            return NotImplemented
+        public, other_public = self._public_attrs(), other._public_attrs()
+        if len(public) != len(other_public):
+            return self._same_fields(other._iter_fields(as_is))
+        return public == other_public and all(
+            same_value(self._field(key, as_is), other._field(key, as_is))
+            for key in SERIALIZED_PROPERTIES
+        )
+
+    def _public_attrs(self) -> list[tuple[str, Any]]:
+        """(key, value) of the attrs in dict(self), except SERIALIZED_PROPERTIES"""
+        return [
+            (key, value)
+            for key, value in self.__dict__.items()
+            if not key.startswith("_")
+        ]
+
+    def _fields_count(self) -> int:
+        """Number of keys in dict(self)"""
+        return len(self._public_attrs()) + len(SERIALIZED_PROPERTIES)
+
+    def _same_fields(self, pairs: Iterable[tuple[str, Any]]) -> bool:
+        """
+        Check if the (key, value) pairs are equal to those of dict(self), in order,
+        without converting items and spells to dicts unless they must be compared
+        with dicts
+        """
+        for (key, value), (other_key, other_value) in zip(
+            self._iter_fields(as_is), pairs
+        ):
+            if key != other_key or not same_value(value, other_value):
                 return False
         return True
 
@@ -410,6 +551,8 @@ class Character:
 
     @property
     def cantrips_known(self) -> SpellList["_SPELL"]:
+        # the list may be changed in place
+        self._changed.add("cantrips_known")
         return self._cantrips_known
 
     @cantrips_known.setter
@@ -421,9 +564,12 @@ class Character:
         self._cantrips_known = (
             new_val if isinstance(new_val, SpellList) else SpellList(initial=new_val)
         )
+        self._changed.add("cantrips_known")
 
     @property
     def spells_known(self) -> SpellList["_SPELL"]:
+        # the list may be changed in place
+        self._changed.add("spells_known")
         return self._spells_known
 
     @spells_known.setter
@@ -435,9 +581,12 @@ class Character:
         self._spells_known = (
             new_val if isinstance(new_val, SpellList) else SpellList(initial=new_val)
         )
+        self._changed.add("spells_known")
 
     @property
     def spells_prepared(self) -> SpellList["_SPELL"]:
+        # the list may be changed in place
+        self._changed.add("spells_prepared")
         return self._spells_prepared
 
     @spells_prepared.setter
@@ -449,9 +598,12 @@ class Character:
         self._spells_prepared = (
             new_val if isinstance(new_val, SpellList) else SpellList(initial=new_val)
         )
+        self._changed.add("spells_prepared")
 
     @property
     def inventory(self) -> list[_Item]:
+        # the list or its items may be changed in place
+        self._changed.add("inventory")
         return self._inventory
 
     @property
@@ -463,6 +615,7 @@ class Character:
         self._dead = new_value
         self._death_saves = 0
         self._death_fails = 0
+        self.mark_changed("dead", "death_saves", "death_fails")
 
     @property
     def death_saves(self) -> int:
@@ -476,8 +629,10 @@ class Character:
             self._death_saves = 0
             self._death_fails = 0
             self._dead = False
+            self.mark_changed("death_saves", "death_fails", "dead")
         else:
             self._death_saves = new_value
+            self.mark_changed("death_saves")
 
     @property
     def death_fails(self) -> int:
@@ -491,8 +646,10 @@ class Character:
             self._death_saves = 0
             self._death_fails = 0
             self._dead = True
+            self.mark_changed("death_saves", "death_fails", "dead")
         else:
             self._death_fails = new_value
+            self.mark_changed("death_fails")
 
     @property
     def current_hp(self) -> int:
@@ -505,6 +662,7 @@ class Character:
         elif new_value > self.max_hp:
             new_value = int(self.max_hp)
         self._current_hp = new_value
+        self._changed.add("current_hp")
 
     @property
     def dexterity(self) -> int:
@@ -513,8 +671,9 @@ class Character:
     @dexterity.setter
     def dexterity(self, new_value: int) -> None:
         self._dexterity = new_value
+        self._changed.add("dexterity")
         self.armor_class = self.base_armor_class
-        for item in self.inventory:
+        for item in self._inventory:
             self.apply_armor_class(item)
 
     @property
@@ -527,8 +686,10 @@ class Character:
             pass
         elif type(new_val) is Experience:
             self._experience = new_val
+            self._changed.add("experience")
         else:
             self._experience._experience = new_val
+            self._changed.add("experience")
             self._experience.update_level()
 
     @property
@@ -551,98 +712,42 @@ class Character:
         if new_class is None:
             return
 
+        template = class_template(new_class)
+
         def set_class() -> None:
             """
             Set miscellaneous class-related properties such as:
             class name, hit dice, level progression data, proficiencies, saving throws,
             spellcasting, and class features
             """
-            self.class_name = new_class.name
-            self.class_index = new_class.index
-            self.hd = new_class.hit_die
+            self.class_name = template.class_name
+            self.class_index = template.class_index
+            self.hd = template.hit_die
             self._class_levels = SRD_class_levels[self.class_index]
-            # Set spellcasting stat to the full name of an ability score
-            ability = {"wis": "wisdom", "cha": "charisma", "int": "intelligence"}
-            if new_class.spellcasting:
-                self.spellcasting_stat = ability[
-                    new_class.spellcasting["spellcasting_ability"]["index"]
-                ]
-            else:
-                self.spellcasting_stat = None
+            self._class_features_level = 0
+            self.spellcasting_stat = template.spellcasting_stat
             self.apply_class_level()
 
             # create dict such as { "all-armor": {"name": "All armor", "type": "Armor"} }
-            for proficiency in new_class.proficiencies:
-                data = SRD(proficiency["url"])
-                self.proficiencies[proficiency["index"]] = {
-                    "name": data["name"],
-                    "type": data["type"],
-                }
+            for index, name, kind in template.proficiencies:
+                self.proficiencies[index] = {"name": name, "type": kind}
+            self.mark_changed("proficiencies")
 
-            self.saving_throws = [
-                saving_throw["name"] for saving_throw in new_class.saving_throws
-            ]
+            self.saving_throws = list(template.saving_throws)
 
         def set_starting_equipment() -> None:
             """
             Sets `player_options["starting_equipment"]` to a list of strings
             """
-            for starting_equipment in new_class.starting_equipment:
-                new_item = Item(starting_equipment["equipment"]["index"])
-                new_item.quantity = starting_equipment["quantity"]
+            for item, quantity in template.starting_equipment:
+                new_item = _Item(**item)
+                new_item.quantity = quantity
                 self.give_item(new_item)
 
-            self.player_options["starting_equipment"] = []
-
-            def add_to_starting_options(choice: str) -> None:
-                self.player_options["starting_equipment"].append(choice)
-
-            def fetch_choices_string(option: dict[str, dict[str, str]]) -> str:
-                choices = SRD(option["equipment_category"]["url"])["equipment"]
-                choices_names = [c["name"] for c in choices]
-                return "{} (choice from {})".format(
-                    option["equipment_category"]["name"], ", ".join(choices_names)
-                )
-
-            for item_option in new_class.starting_equipment_options:
-                options = []
-                opts = item_option["from"]
-                if "options" not in opts.keys():
-                    choices = fetch_choices_string(opts)
-                    add_to_starting_options(choices)
-
-                else:
-                    for opt in opts["options"]:
-                        opt_type = opt["option_type"]
-                        if opt_type == "counted_reference":
-                            options.append(
-                                "{} x {}".format(opt["count"], opt["of"]["name"])
-                            )
-                        elif opt_type == "choice":
-                            how_many = opt["choice"]["choose"]
-                            choices = fetch_choices_string(opt["choice"]["from"])
-                            options.append("{} x {}".format(how_many, choices))
-                        elif opt_type == "multiple":
-                            try:
-                                combo = [
-                                    str(c["count"]) + " " + c["of"]["name"]
-                                    for c in opt["items"]
-                                ]
-                                add_to_starting_options("{}".format(", ".join(combo)))
-                            except KeyError:
-                                # shield or martial weapon
-                                martial_weapons = fetch_choices_string(
-                                    opt["items"][0]["choice"]["from"]
-                                )
-                                shield = opt["items"][1]["of"]["name"]
-                                add_to_starting_options(
-                                    "choose 1 from {} or a {}".format(
-                                        martial_weapons, shield
-                                    )
-                                )
-                                continue
-
-                    add_to_starting_options("choose from {}".format(", ".join(options)))
+            self.player_options["starting_equipment"] = list(
+                template.starting_equipment_options
+            )
+            self.mark_changed("player_options")
 
         set_class()
         set_starting_equipment()
@@ -652,21 +757,30 @@ class Character:
         Applies changes based on the character's class and level
         e.g., adds new class features, spell slots
         Called by `level.setter` and `classs.setter`
+
+        Only the class features of levels gained since the last call are added.
+        After a level down, features of the higher levels are kept, as before.
         """
         if not self._class_levels or self.level > 20:
             return
-        for data in self._class_levels:
-            if data["level"] > self.level:
-                break
-            self.ability_score_bonus = data.get(
-                "ability_score_bonuses", self.ability_score_bonus
-            )
-            self.prof_bonus = data.get("prof_bonus", self.prof_bonus)
-            for feat in data["features"]:
-                self.class_features[feat["index"]] = SRD(feat["url"])
+        template = level_template(self.class_index, self._class_levels, self.level)
+        if template is not None:
+            if template.ability_score_bonus is not None:
+                self.ability_score_bonus = template.ability_score_bonus
+            if template.prof_bonus is not None:
+                self.prof_bonus = template.prof_bonus
+            if template.level > self._class_features_level:
+                # add the features gained since the last call
+                gained = template.class_features[
+                    self._class_features_count(self._class_features_level) :
+                ]
+                self.class_features.update(gained)
+                self._class_features_level = template.level
+                self.mark_changed("class_features")
 
         while len(self.class_features_enabled) < len(self.class_features):
             self.class_features_enabled.append(True)
+            self.mark_changed("class_features_enabled")
 
         # During level up some class specific values change. example: rage damage bonus 2 -> 4
         # Class specific counters do not reset! example: available inspirations
@@ -695,6 +809,11 @@ class Character:
         self.update_spell_lists()
         self.set_spell_slots(spell_slots)
 
+    def _class_features_count(self, level: int) -> int:
+        """Number of class features gained up to `level`"""
+        template = level_template(self.class_index, self._class_levels, level)
+        return 0 if template is None else len(template.class_features)
+
     def update_spell_lists(self) -> None:
         """Set maximum of spells_known, spells_prepared, cantrips_known"""
         spell_slots = (
@@ -739,17 +858,20 @@ class Character:
     @level.setter
     def level(self, new_level: int) -> None:
         self._level = new_level
+        self._update_hit_points()
+        self.apply_class_level()
+
+    def _update_hit_points(self) -> None:
+        """Sets maximum hit points and hit dice for the character's level"""
+        max_hp = Character.get_maximum_hp(self.hd, self._level, self.constitution)
         if self.current_hp == self.max_hp:
-            self.current_hp = Character.get_maximum_hp(
-                self.hd, new_level, self.constitution
-            )
-        self.max_hp = Character.get_maximum_hp(self.hd, new_level, self.constitution)
+            self.current_hp = max_hp
+        self.max_hp = max_hp
         if self.current_hd == self.max_hd:
-            self.current_hd = new_level
-        self.max_hd = new_level
+            self.current_hd = self._level
+        self.max_hd = self._level
         if self.current_hd > self.max_hd:
             self.current_hd = self.max_hd
-        self.apply_class_level()
 
     def remove_shields(self) -> None:
         """Removes all shields from self._inventory. Used by self.give_item when equipping shield"""
@@ -759,6 +881,7 @@ class Character:
                 and item.armor_category == "Shield"
             ):
                 self._inventory.pop(i)
+                self.mark_changed("inventory")
 
     def remove_armor(self) -> None:
         """Removes all armor from self._inventory. Used by self.give_item when equipping armor"""
@@ -768,6 +891,7 @@ class Character:
                 and item.armor_category != "Shield"
             ):
                 self._inventory.pop(i)
+                self.mark_changed("inventory")
 
     def apply_armor_class(self, item: _Item) -> None:
         if item.equipment_category["index"] == "armor":
@@ -801,7 +925,8 @@ class Character:
         and any other armor/shields in the inventory will be removed.
         """
         self.apply_armor_class(item)
-        self.inventory.append(item)
+        self._inventory.append(item)
+        self.mark_changed("inventory")
 
     def remove_item(self, item: _Item) -> None:
         if item.equipment_category["index"] == "armor":
@@ -822,6 +947,7 @@ class Character:
                 )
 
         self._inventory.remove(item)
+        self.mark_changed("inventory")
 
     def change_wealth(
         self,
@@ -851,6 +977,7 @@ class Character:
                         f"Character has not enough {unit}! Current balance: {self.wealth_detailed[unit]}"
                     )
                 self.wealth_detailed[unit] = new_value
+            self.mark_changed("wealth_detailed")
 
         self.wealth = new_wealth
 
@@ -903,3 +1030,7 @@ class Character:
             + ((int(hd / 2) + 1) * (level - 1))
             + Character.get_ability_modifier(constitution)
         )
+
+
+# serialization imports Character, so it's imported once this module is defined
+from . import serialization  # noqa: E402
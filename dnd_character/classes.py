@@ -27,6 +27,17 @@ class _CLASS:
     spellcasting: Optional[dict] = None
     spells: Optional[str] = None
 
+    def __reduce_ex__(self, protocol):
+        # the constants in CLASSES are pickled by index, e.g. to send characters
+        # between processes, and unpickled as the same constants
+        if CLASSES.get(self.index) is self:
+            return (srd_class, (self.index,))
+        return object.__reduce_ex__(self, protocol)
+
+
+def srd_class(index: str) -> _CLASS:
+    return CLASSES[index]
+
 
 CLASSES = {
     class_index: _CLASS(**class_data) for class_index, class_data in SRD_classes.items()
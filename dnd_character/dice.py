@@ -1,4 +1,5 @@
 import random
+from operator import add
 
 
 def sum_rolls(
@@ -27,6 +28,27 @@ def sum_rolls(
     return sum(rolls)
 
 
+def sum_rolls_many(
+    count: int,
+    *,  # Force caller to use keyword arguments
+    d100: int = 0,
+    d20: int = 0,
+    d12: int = 0,
+    d10: int = 0,
+    d8: int = 0,
+    d6: int = 0,
+    d4: int = 0,
+) -> list[int]:
+    """Expected use: sum_rolls for each of `count` targets, e.g. area damage"""
+    totals = [0] * count
+    dice = {100: d100, 20: d20, 12: d12, 10: d10, 8: d8, 6: d6, 4: d4}
+    for sides, num in dice.items():
+        faces = range(1, sides + 1)
+        for _ in range(num):
+            totals = list(map(add, totals, random.choices(faces, k=count)))
+    return totals
+
+
 def roll_with_advantage_disadvantage(
     dice: int = 20, advantage: bool = False, disadvantage: bool = False
 ) -> int:
@@ -1,13 +1,10 @@
 from typing import Union, Optional
 from dataclasses import dataclass, asdict
 from uuid import uuid4
-from .SRD import SRD_endpoints, SRD
+from .SRD import SRD, SRDIndex
 
 
-SRD_equipment = {
-    result["index"]: SRD(result["url"])
-    for result in SRD(SRD_endpoints["equipment"])["results"]
-}
+SRD_equipment = SRDIndex("equipment")
 
 
 @dataclass(kw_only=True)
@@ -71,3 +68,14 @@ def Item(item: Union[str, dict]) -> _Item:
         return _Item(**SRD_equipment[item])
     else:
         return _Item(**item)
+
+
+def equipment_by_category(category: str) -> list[str]:
+    """Returns the index of every item in an equipment category (e.g., armor)"""
+    if hasattr(SRD.store, "query"):
+        return SRD.store.query("equipment", equipment_category=category)
+    return [
+        index
+        for index, item in SRD_equipment.items()
+        if item["equipment_category"]["index"] == category
+    ]
@@ -17,11 +17,15 @@ LOG = logging.getLogger(__package__)
 
 
 class Experience:
-    def __init__(self, character: "Character", experience: int):
+    def __init__(
+        self, character: "Character", experience: int, update_level: bool = True
+    ):
         # this typically occurs while `character` is partially initialized (during __init__)
+        # Character.__init__ passes update_level=False and sets the level itself
         self.character = character
         self._experience = experience
-        self.character.level = level_at_experience(experience)
+        if update_level:
+            self.update_level()
 
     @property
     def experience(self) -> "Experience":
@@ -30,6 +34,7 @@ class Experience:
     @experience.setter
     def experience(self, new_val: int) -> None:
         self._experience = new_val
+        self.character.mark_changed("experience")
         self.update_level()
 
     def update_level(self) -> None:
@@ -0,0 +1,145 @@
+"""
+Generate many random characters, in parallel across processes
+
+    for character in generate_characters(1000, classes=["bard", "wizard"], seed=1):
+        ...
+
+Each character is rolled from its own seed, made from `seed` and its position,
+so the same seed generates the same characters (including their uids)
+no matter how many worker processes are used. Characters are yielded in order
+as the workers finish them; only a few chunks are in progress at a time.
+"""
+import multiprocessing
+import os
+import random
+from collections import deque
+from typing import Any, Callable, Iterable, Iterator, Optional, Union, TYPE_CHECKING
+from uuid import UUID
+from .character import Character
+from .classes import CLASSES
+from .templates import class_template, srd_level_templates
+
+if TYPE_CHECKING:
+    from .classes import _CLASS
+
+
+def random_uuid() -> UUID:
+    """A version 4 UUID from `random`, so that it is reproducible with random.seed"""
+    return UUID(int=random.getrandbits(128), version=4)
+
+
+def generate_character(
+    seed: Union[int, str],
+    classes: tuple["_CLASS", ...],
+    level: Union[int, tuple[int, int]] = 1,
+    **kwargs,
+) -> Character:
+    """
+    Generate one character from `seed`, of a class chosen from `classes`,
+    at `level` or a level chosen from the range (lowest, highest).
+    Other keyword arguments are passed to Character.
+    The state of `random` is set by this function.
+    """
+    random.seed(seed)
+    classs = random.choice(classes)
+    character = Character(
+        uid=random_uuid(),
+        classs=classs,
+        level=level if isinstance(level, int) else random.randint(*level),
+        **kwargs,
+    )
+    for item in character.inventory:
+        # items from the SRD share the default uid of _Item, which may differ
+        # between processes
+        item.uid = random_uuid().hex
+    character.clear_changes()
+    return character
+
+
+def generate_chunk(
+    seed: int,
+    start: int,
+    stop: int,
+    classes: tuple["_CLASS", ...],
+    level: Union[int, tuple[int, int]],
+    kwargs: dict,
+) -> list[Character]:
+    """Generate the characters numbered `start` to `stop` (excluded)"""
+    state = random.getstate()
+    try:
+        return [
+            generate_character(f"{seed}:{i}", classes, level, **kwargs)
+            for i in range(start, stop)
+        ]
+    finally:
+        random.setstate(state)
+
+
+def imap_ordered(
+    func: Callable[..., Any], tasks: Iterable[tuple], workers: int
+) -> Iterator[Any]:
+    """
+    func(*task) for each task, run by `workers` processes and yielded in order.
+    A few tasks per worker are in progress while results are consumed,
+    so `tasks` can be a long generator.
+    """
+    with multiprocessing.Pool(workers) as pool:
+        pending: deque = deque()
+        for task in tasks:
+            pending.append(pool.apply_async(func, task))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().get()
+        while pending:
+            yield pending.popleft().get()
+
+
+def generate_characters(
+    n: int,
+    *,
+    classes: Optional[Iterable[Union[str, "_CLASS"]]] = None,
+    level: Union[int, tuple[int, int]] = 1,
+    seed: Optional[int] = None,
+    workers: Optional[int] = None,
+    chunksize: int = 128,
+    **kwargs,
+) -> Iterator[Character]:
+    """
+    Generate `n` random characters, yielded one by one in order
+
+    Arguments:
+            classes (iterable): class indexes (e.g. "bard") or _CLASS objects to
+                                choose from (default: all classes in CLASSES)
+            level   (int or tuple): level, or range (lowest, highest) of levels
+            seed    (int): the same seed generates the same characters
+                           (default: a seed from `random`)
+            workers (int): number of worker processes (default: os.cpu_count());
+                           0 or 1 generates the characters in this process
+            chunksize (int): number of characters generated per task
+    Other keyword arguments are passed to Character, e.g. species="Elf".
+    """
+    classes = tuple(
+        CLASSES[classs] if isinstance(classs, str) else classs
+        for classs in (CLASSES.values() if classes is None else classes)
+    )
+    if not classes:
+        raise ValueError("No classes to choose from")
+    if seed is None:
+        seed = random.getrandbits(64)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    chunks = (
+        (seed, start, min(start + chunksize, n), classes, level, kwargs)
+        for start in range(0, n, chunksize)
+    )
+    if workers <= 1:
+        for chunk in chunks:
+            yield from generate_chunk(*chunk)
+        return
+
+    # build the class templates here, so that forked workers inherit them
+    for classs in classes:
+        class_template(classs)
+        if classs.index in CLASSES:
+            srd_level_templates(classs.index)
+    for characters in imap_ordered(generate_chunk, chunks, workers):
+        yield from characters
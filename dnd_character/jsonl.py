@@ -0,0 +1,165 @@
+"""
+Stream characters to and from JSON Lines files, one dict(character) per line
+
+    write_characters(characters, "roster.jsonl.gz")
+    for character in read_characters("roster.jsonl.gz"):
+        ...
+
+Characters are read and written one line at a time, so a file of any size
+uses little memory. Paths ending with .gz are compressed with gzip, and "-"
+is stdin or stdout. Lines written by `compact_dict` are read as well.
+`read_characters` can construct the characters in worker processes,
+which is only faster with several CPUs since the characters are sent back.
+
+Command line:
+    python -m dnd_character.jsonl convert roster.jsonl backup.jsonl.gz --compact
+    python -m dnd_character.jsonl check backup.jsonl.gz --workers 4
+"""
+import argparse
+import gzip
+import json
+import sys
+from contextlib import contextmanager
+from itertools import islice
+from os import PathLike
+from typing import IO, Any, Iterable, Iterator, Union
+from .character import Character
+from .generation import imap_ordered
+from .serialization import compact_dict, from_compact_dict, to_json
+
+File = Union[str, PathLike, IO[str]]
+
+
+@contextmanager
+def open_text(file: File, mode: str) -> Iterator[IO[str]]:
+    """Open a path (with gzip if it ends with .gz), or use an open text file"""
+    if not isinstance(file, (str, PathLike)):
+        yield file
+    elif file == "-":
+        yield sys.stdin if mode == "r" else sys.stdout
+    elif str(file).endswith(".gz"):
+        # level 6 compresses twice as fast as the default 9, 2% larger
+        with gzip.open(file, mode + "t", compresslevel=6, encoding="utf-8") as stream:
+            yield stream
+    else:
+        with open(file, mode, encoding="utf-8") as stream:
+            yield stream
+
+
+def encode_character(
+    character: Union[Character, dict[str, Any]], compact: bool = False
+) -> str:
+    """One line of JSON (without the newline) for a character or its dict"""
+    if compact:
+        if not isinstance(character, Character):
+            character = from_compact_dict(dict(character))
+        return json.dumps(compact_dict(character))
+    if isinstance(character, Character):
+        return to_json(character)
+    return json.dumps(dict(character))
+
+
+def write_characters(
+    characters: Iterable[Union[Character, dict[str, Any]]],
+    file: File,
+    compact: bool = False,
+) -> int:
+    """
+    Write characters (or dicts of characters) to a JSON Lines file,
+    as dict(character) or as compact_dict(character) if `compact` is True.
+    Returns the number of characters written.
+    """
+    num = 0
+    with open_text(file, "w") as stream:
+        for character in characters:
+            stream.write(encode_character(character, compact) + "\n")
+            num += 1
+    return num
+
+
+def read_lines(file: File) -> Iterator[tuple[int, str]]:
+    """(line number, line) of each line which isn't blank"""
+    with open_text(file, "r") as stream:
+        for lineno, line in enumerate(stream, 1):
+            if line.strip():
+                yield lineno, line
+
+
+def decode_line(lineno: int, line: str) -> dict[str, Any]:
+    try:
+        return json.loads(line)
+    except json.JSONDecodeError as error:
+        raise ValueError(f"Line {lineno} is not valid JSON: {error}") from error
+
+
+def read_dicts(file: File) -> Iterator[dict[str, Any]]:
+    """The dict of each character in a JSON Lines file, without constructing it"""
+    for lineno, line in read_lines(file):
+        yield decode_line(lineno, line)
+
+
+def load_lines(lines: list[tuple[int, str]]) -> list[Character]:
+    return [from_compact_dict(decode_line(lineno, line)) for lineno, line in lines]
+
+
+def chunks_of(lines: Iterator[tuple[int, str]], size: int) -> Iterator[tuple]:
+    """Tasks of `load_lines` for `imap_ordered`, of `size` lines each"""
+    while True:
+        chunk = list(islice(lines, size))
+        if not chunk:
+            return
+        yield (chunk,)
+
+
+def read_characters(
+    file: File, *, workers: int = 1, chunksize: int = 256
+) -> Iterator[Character]:
+    """
+    Construct each character of a JSON Lines file, yielded one by one in order
+
+    Arguments:
+            workers   (int): number of worker processes constructing characters;
+                             0 or 1 constructs them in this process
+            chunksize (int): number of lines sent to a worker at a time
+    """
+    lines = read_lines(file)
+    if workers <= 1:
+        for lineno, line in lines:
+            yield from_compact_dict(decode_line(lineno, line))
+        return
+    for characters in imap_ordered(load_lines, chunks_of(lines, chunksize), workers):
+        yield from characters
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="dnd_character.jsonl",
+        description="read and write characters in JSON Lines files",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    convert = commands.add_parser(
+        "convert", help="load each character of a file and write it to another"
+    )
+    convert.add_argument("source", help="file to read (- for stdin)")
+    convert.add_argument("destination", help="file to write (- for stdout)")
+    convert.add_argument(
+        "--compact", action="store_true", help="write compact_dict(character)"
+    )
+    convert.add_argument("--workers", type=int, default=1)
+    check = commands.add_parser("check", help="check that each character loads")
+    check.add_argument("source", help="file to read (- for stdin)")
+    check.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+
+    characters = read_characters(args.source, workers=args.workers)
+    if args.command == "convert":
+        num = write_characters(characters, args.destination, args.compact)
+        # stdout may be the destination
+        print(f"Converted {num} characters", file=sys.stderr)
+    elif args.command == "check":
+        num = sum(1 for _ in characters)
+        print(f"Loaded {num} characters")
+
+
+if __name__ == "__main__":
+    main()
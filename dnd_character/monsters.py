@@ -1,13 +1,10 @@
 from uuid import uuid4
 from typing import Optional, Union
 from dataclasses import dataclass, asdict
-from .SRD import SRD_endpoints, SRD
+from .SRD import SRD, SRDIndex
 
 
-SRD_monsters = {
-    result["index"]: SRD(result["url"])
-    for result in SRD(SRD_endpoints["monsters"])["results"]
-}
+SRD_monsters = SRDIndex("monsters")
 
 
 @dataclass(kw_only=True)
@@ -68,3 +65,16 @@ def Monster(monster: Union[str, dict]) -> _Monster:
     else:
         # deserialized monster
         return _Monster(**monster)
+
+
+def monsters_by_challenge_rating(minimum: float, maximum: float) -> list[str]:
+    """Returns the index of every monster with a challenge rating in this range"""
+    if hasattr(SRD.store, "query"):
+        return SRD.store.query(
+            "monsters", min_challenge_rating=minimum, max_challenge_rating=maximum
+        )
+    return [
+        index
+        for index, monster in SRD_monsters.items()
+        if minimum <= monster["challenge_rating"] <= maximum
+    ]
@@ -0,0 +1,216 @@
+"""
+A roster of characters whose most used stats are stored in columns
+
+    roster = Roster(characters)
+    roster.damage(roster.with_condition("prone"), d6=2)
+    print(roster.mean("level"))
+    for character in roster:
+        ...
+
+Each of `COLUMNS` is an array.array with one value per character: scanning
+or changing a stat of thousands of characters goes through one array instead
+of thousands of objects. While characters are in a roster, the columns hold
+their stats. `roster[i]`, iterating and `roster.characters()` write the columns
+back into the characters (only the values that differ, marked as changed),
+and `roster.update(i)` reads them again after a character was changed by its
+own methods (e.g. `give_item`, which may change the armor class).
+
+The level column is read-only, since the level follows the experience:
+a changed experience is set on the character, which levels up or down
+(changing its max_hp, etc.) and the columns are read again. Other columns
+are written into the characters without side effects, as when a character
+is constructed from its dict: changing dexterity doesn't change the armor class.
+"""
+from array import array
+from operator import attrgetter
+from statistics import fmean
+from typing import Iterable, Iterator, Optional
+from .character import CONDITIONS, Character
+from .dice import sum_rolls_many
+
+# typecode of each column, in the order of read_stats
+COLUMNS = {
+    "strength": "i",
+    "dexterity": "i",
+    "constitution": "i",
+    "wisdom": "i",
+    "intelligence": "i",
+    "charisma": "i",
+    "level": "i",
+    "max_hp": "i",
+    "current_hp": "i",
+    "armor_class": "i",
+    "dead": "b",
+    "experience": "i",
+    # bit i is set if the character has CONDITIONS[i]
+    "conditions": "H",
+}
+
+# attr of Character holding each column, except experience and conditions
+# (level is only read)
+ATTRS = {
+    "strength": "strength",
+    "dexterity": "_dexterity",
+    "constitution": "constitution",
+    "wisdom": "wisdom",
+    "intelligence": "intelligence",
+    "charisma": "charisma",
+    "level": "_level",
+    "max_hp": "max_hp",
+    "current_hp": "_current_hp",
+    "armor_class": "armor_class",
+    "dead": "_dead",
+}
+
+get_attrs = attrgetter(*ATTRS.values())
+
+
+def condition_flags(conditions: dict[str, bool]) -> int:
+    return sum(1 << i for i, name in enumerate(CONDITIONS) if conditions.get(name))
+
+
+def read_stats(character: Character) -> tuple[int, ...]:
+    """The value of each column for a character"""
+    return (
+        *get_attrs(character),
+        character._experience._experience,
+        condition_flags(character.conditions),
+    )
+
+
+def write_stats(character: Character, stats: tuple[int, ...]) -> None:
+    """Set the stats of a character which differ from `stats`"""
+    current = read_stats(character)
+    for (column, attr), value, old_value in zip(ATTRS.items(), stats, current):
+        if column == "level":
+            continue
+        if column == "dead":
+            value = bool(value)
+        if value != old_value:
+            setattr(character, attr, value)
+            character.mark_changed(column)
+    experience, flags = stats[-2:]
+    if experience != current[-2]:
+        # updates the level, after the other stats
+        character.experience = experience
+    if flags != current[-1]:
+        for i, name in enumerate(CONDITIONS):
+            if bool(flags & 1 << i) != bool(character.conditions.get(name)):
+                character.conditions[name] = bool(flags & 1 << i)
+        character.mark_changed("conditions")
+
+
+def rolls(count: int, amount: Optional[int], dice: dict[str, int]) -> list[int]:
+    """`amount` for each of `count` characters, or a roll of `dice` for each"""
+    if amount is None:
+        return sum_rolls_many(count, **dice)
+    return [amount] * count
+
+
+class Roster:
+    def __init__(self, characters: Iterable[Character] = ()) -> None:
+        self._characters: list[Character] = []
+        self.columns: dict[str, array] = {
+            name: array(typecode) for name, typecode in COLUMNS.items()
+        }
+        self.extend(characters)
+
+    def append(self, character: Character) -> None:
+        self._characters.append(character)
+        for column, value in zip(self.columns.values(), read_stats(character)):
+            column.append(value)
+
+    def extend(self, characters: Iterable[Character]) -> None:
+        for character in characters:
+            self.append(character)
+
+    def update(self, index: int) -> None:
+        """Read the stats of a character again, after it was changed directly"""
+        self._set_stats(index, read_stats(self._characters[index]))
+
+    def _set_stats(self, index: int, stats: tuple[int, ...]) -> None:
+        for column, value in zip(self.columns.values(), stats):
+            column[index] = value
+
+    def __len__(self) -> int:
+        return len(self._characters)
+
+    def __getitem__(self, index: int) -> Character:
+        """The character at `index`, with the stats of the columns"""
+        character = self._characters[index]
+        stats = tuple(column[index] for column in self.columns.values())
+        write_stats(character, stats)
+        new_stats = read_stats(character)
+        if new_stats != stats:
+            # the level changed, or the level column was written
+            self._set_stats(index, new_stats)
+        return character
+
+    def __iter__(self) -> Iterator[Character]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def characters(self) -> list[Character]:
+        """Every character, with the stats of the columns"""
+        return list(self)
+
+    def _indexes(self, indexes: Optional[Iterable[int]]) -> Iterable[int]:
+        return range(len(self)) if indexes is None else indexes
+
+    def mean(self, column: str, indexes: Optional[Iterable[int]] = None) -> float:
+        """Mean of a column, e.g. roster.mean("level"), for all or some characters"""
+        values = self.columns[column]
+        if indexes is None:
+            return fmean(values)
+        return fmean(values[index] for index in indexes)
+
+    def with_condition(self, condition: str) -> list[int]:
+        """Indexes of the characters with a condition, e.g. "prone" """
+        flag = 1 << CONDITIONS.index(condition)
+        return [i for i, flags in enumerate(self.columns["conditions"]) if flags & flag]
+
+    def set_condition(
+        self, condition: str, value: bool, indexes: Optional[Iterable[int]] = None
+    ) -> None:
+        flag = 1 << CONDITIONS.index(condition)
+        conditions = self.columns["conditions"]
+        for index in self._indexes(indexes):
+            conditions[index] = (
+                conditions[index] | flag if value else conditions[index] & ~flag
+            )
+
+    def damage(
+        self,
+        indexes: Optional[Iterable[int]] = None,
+        amount: Optional[int] = None,
+        **dice: int,
+    ) -> list[int]:
+        """
+        Subtract `amount`, or a roll of `dice` for each character (e.g. d6=2),
+        from the current_hp of all or some characters, down to 0.
+        Returns the damage rolled for each character.
+        """
+        indexes = list(self._indexes(indexes))
+        amounts = rolls(len(indexes), amount, dice)
+        current_hp = self.columns["current_hp"]
+        for index, damage in zip(indexes, amounts):
+            current_hp[index] = max(current_hp[index] - damage, 0)
+        return amounts
+
+    def heal(
+        self,
+        indexes: Optional[Iterable[int]] = None,
+        amount: Optional[int] = None,
+        **dice: int,
+    ) -> list[int]:
+        """
+        Add `amount`, or a roll of `dice` for each character (e.g. d4=2),
+        to the current_hp of all or some characters, up to their max_hp.
+        Returns the healing rolled for each character.
+        """
+        indexes = list(self._indexes(indexes))
+        amounts = rolls(len(indexes), amount, dice)
+        current_hp, max_hp = self.columns["current_hp"], self.columns["max_hp"]
+        for index, healing in zip(indexes, amounts):
+            current_hp[index] = min(current_hp[index] + healing, max_hp[index])
+        return amounts
@@ -0,0 +1,305 @@
+"""
+Fast and compact serialization of characters
+
+`to_dict` returns the same as dict(obj) for characters, items, spells and
+monsters, without copying the SRD documents they hold (dict(obj) deep copies
+items, spells and monsters with dataclasses.asdict). `to_json` writes it as JSON.
+
+dict(character) includes a copy of every SRD document the character holds:
+each item in the inventory, each spell, each class feature (descriptions
+included) and each proficiency. `compact_dict` replaces them by their index,
+keeping only what differs from the SRD (e.g. an item's uid and quantity),
+and `from_compact_dict` loads them back from the SRD.
+
+    data = compact_dict(character)
+    character = from_compact_dict(json.loads(json.dumps(data)))
+
+Documents which don't come from the SRD, or which were changed, are kept whole.
+A compact dict is only as stable as the SRD it refers to: if the SRD changes,
+a character loaded from it gets the new documents.
+"""
+import hashlib
+import json
+from dataclasses import fields
+from functools import lru_cache
+from operator import attrgetter
+from typing import Any, Callable, Optional, Union
+from .SRD import SRD, JsonData
+from .character import Character, as_is
+from .equipment import _Item, SRD_equipment
+from .monsters import _Monster
+from .spellcasting import _SPELL, SPELLS, SRD_spells
+
+
+@lru_cache(maxsize=None)
+def field_getter(cls: type) -> tuple[tuple[str, ...], Callable[[Any], tuple]]:
+    """Names of the fields of a dataclass, and a function getting their values"""
+    names = tuple(field.name for field in fields(cls))
+    return names, attrgetter(*names)
+
+
+def shallow_dict(obj: Union[_Item, _SPELL, _Monster, dict]) -> dict[str, Any]:
+    """
+    Like dict(obj) for an item, spell or monster (which may already be a dict),
+    except that the values are not copied
+    """
+    if isinstance(obj, dict):
+        return dict(obj)
+    names, getter = field_getter(type(obj))
+    return dict(zip(names, getter(obj)))
+
+
+def to_dict(obj: Union[Character, _Item, _SPELL, _Monster]) -> dict[str, Any]:
+    """
+    Equal to dict(obj), but the dicts and lists inside it are shared with `obj`
+    (and often with the SRD) instead of copied, so they must not be modified
+    """
+    if isinstance(obj, Character):
+        return dict(obj._iter_fields(shallow_dict))
+    return shallow_dict(obj)
+
+
+# JSON of SRD class features and spells by (endpoint, index), with the document
+# it encodes (documents from the SRD are treated as immutable)
+SRD_JSON: dict[tuple[str, str], tuple[Any, str]] = {}
+
+
+def srd_json(
+    endpoint: str,
+    index: str,
+    document: Any,
+    encode: Callable[[Any], str],
+    cache: dict[tuple[str, str], tuple[Any, str]] = SRD_JSON,
+) -> str:
+    """encode(document), which is only called once for each SRD document"""
+    cached = cache.get((endpoint, index))
+    if cached is not None and cached[0] is document:
+        return cached[1]
+    text = encode(document)
+    if endpoint == "spells":
+        srd = SPELLS.get(index) if index in SRD_spells else None
+    else:
+        srd = srd_document(endpoint, index)
+    if document is srd:
+        cache[endpoint, index] = (document, text)
+    return text
+
+
+def feature_json(index: str, feature: JsonData) -> str:
+    """JSON of a class feature, as an entry of Character.class_features"""
+    return srd_json(
+        "features",
+        index,
+        feature,
+        lambda feature: f"{json.dumps(index)}: {json.dumps(feature)}",
+    )
+
+
+def spell_json(spell: Union[_SPELL, dict]) -> str:
+    """JSON of a spell, as an entry of Character.spells_known (etc.)"""
+    if isinstance(spell, dict):
+        return json.dumps(spell)
+    return srd_json(
+        "spells", spell.index, spell, lambda spell: json.dumps(shallow_dict(spell))
+    )
+
+
+def to_json(obj: Union[Character, _Item, _SPELL, _Monster], **kwargs) -> str:
+    """
+    Same as json.dumps(dict(obj), **kwargs). For a character without kwargs,
+    the JSON of SRD class features and spells is only encoded once, and reused
+    """
+    if kwargs or not isinstance(obj, Character):
+        return json.dumps(to_dict(obj), **kwargs)
+    parts = []
+    # consecutive keys which are encoded together
+    data: dict[str, Any] = {}
+    for key, value in obj._iter_fields(as_is):
+        if key == "class_features":
+            value_json = (
+                "{"
+                + ", ".join(
+                    feature_json(index, feature) for index, feature in value.items()
+                )
+                + "}"
+            )
+        elif key in ("cantrips_known", "spells_known", "spells_prepared"):
+            value_json = "[" + ", ".join(spell_json(spell) for spell in value) + "]"
+        else:
+            data[key] = value if key != "inventory" else list(map(shallow_dict, value))
+            continue
+        if data:
+            parts.append(json.dumps(data)[1:-1])
+            data = {}
+        parts.append(f"{json.dumps(key)}: {value_json}")
+    if data:
+        parts.append(json.dumps(data)[1:-1])
+    return "{" + ", ".join(parts) + "}"
+
+
+def digest(value: Any) -> str:
+    """Hash of the JSON of `value` with sorted keys"""
+    text = json.dumps(value, sort_keys=True, separators=(",", ":"))
+    return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+
+
+# digests of SRD class features and spells, like SRD_JSON
+SRD_DIGESTS: dict[tuple[str, str], tuple[Any, str]] = {}
+
+
+def spell_digest(spell: Union[_SPELL, dict]) -> str:
+    if isinstance(spell, dict):
+        return digest(spell)
+    return srd_json(
+        "spells",
+        spell.index,
+        spell,
+        lambda spell: digest(shallow_dict(spell)),
+        SRD_DIGESTS,
+    )
+
+
+def fingerprint(obj: Union[Character, _Item, _SPELL, _Monster, dict]) -> str:
+    """
+    Hash of the content of dict(obj), which may be given as a dict:
+    dicts which are equal (whatever the order of their keys) have the same
+    fingerprint, which is the same in every process.
+    Characters are hashed without encoding their SRD class features and spells
+    again, so comparing fingerprints is a fast way to find changed characters.
+    """
+    if isinstance(obj, Character):
+        data = dict(obj._iter_fields(as_is))
+    else:
+        data = dict(obj) if isinstance(obj, dict) else to_dict(obj)
+    if isinstance(data.get("class_features"), dict):
+        data["class_features"] = {
+            index: srd_json("features", index, feature, digest, SRD_DIGESTS)
+            for index, feature in data["class_features"].items()
+        }
+    for key in ("cantrips_known", "spells_known", "spells_prepared"):
+        if isinstance(data.get(key), list):
+            data[key] = [spell_digest(spell) for spell in data[key]]
+    if isinstance(data.get("inventory"), list):
+        data["inventory"] = [
+            digest(item if isinstance(item, dict) else shallow_dict(item))
+            for item in data["inventory"]
+        ]
+    return digest(data)
+
+
+def apply_patch(data: dict[str, Any], patch: dict[str, Any]) -> dict[str, Any]:
+    """
+    A saved dict(character) updated with `character.patch()`, as a new dict
+    (each changed key of the character is replaced whole)
+    """
+    return {**data, **patch}
+
+
+@lru_cache(maxsize=None)
+def srd_item_dict(index: str) -> dict[str, Any]:
+    """dict() of a new item from the SRD, which must not be modified"""
+    return dict(_Item(**SRD_equipment[index]))
+
+
+def compact_item(item: Union[_Item, dict]) -> dict[str, Any]:
+    """The index of an SRD item, with its uid and the fields that differ from the SRD"""
+    data = dict(item)
+    if data["index"] not in SRD_equipment:
+        return data
+    srd_item = srd_item_dict(data["index"])
+    compact = {"index": data["index"], "uid": data["uid"]}
+    for key, value in data.items():
+        if key not in compact and srd_item[key] != value:
+            compact[key] = value
+    return compact
+
+
+def compact_spell(spell: Union[_SPELL, dict]) -> Union[str, dict[str, Any]]:
+    """The index of an SRD spell, or the whole spell if it isn't from the SRD"""
+    index = spell["index"] if isinstance(spell, dict) else spell.index
+    if index in SRD_spells:
+        srd_spell = SPELLS[index]
+        if spell is srd_spell or dict(spell) == dict(srd_spell):
+            return index
+    return dict(spell)
+
+
+def srd_document(endpoint: str, index: str) -> Optional[JsonData]:
+    """The SRD document /api/{endpoint}/{index}, or None if the SRD doesn't have it"""
+    url = f"/api/{endpoint}/{index}"
+    if url in SRD.cache or url in SRD.store:
+        return SRD(url)
+    return None
+
+
+def compact_feature(index: str, feature: JsonData) -> Optional[JsonData]:
+    """None for an SRD class feature, or the whole feature if it isn't from the SRD"""
+    srd_feature = srd_document("features", index)
+    if srd_feature is not None and (feature is srd_feature or feature == srd_feature):
+        return None
+    return feature
+
+
+def srd_proficiency(index: str) -> Optional[dict[str, str]]:
+    """Name and type of an SRD proficiency, as in Character.proficiencies"""
+    proficiency = srd_document("proficiencies", index)
+    if proficiency is None:
+        return None
+    return {"name": proficiency["name"], "type": proficiency["type"]}
+
+
+def compact_dict(character: Character) -> dict[str, Any]:
+    """
+    Like dict(character), except that SRD items, spells, class features and
+    proficiencies are replaced by references to the SRD:
+    - inventory: each SRD item is a dict of its index, uid and changed fields
+    - cantrips_known, spells_known, spells_prepared: each SRD spell is its index
+    - class_features, proficiencies: each one from the SRD is None
+    """
+    data = to_dict(character)
+    data["inventory"] = [compact_item(item) for item in data["inventory"]]
+    for key in ("cantrips_known", "spells_known", "spells_prepared"):
+        # the private lists, since reading the properties marks them as changed
+        spells = getattr(character, "_" + key)
+        data[key] = [compact_spell(spell) for spell in spells]
+    data["class_features"] = {
+        index: compact_feature(index, feature)
+        for index, feature in character.class_features.items()
+    }
+    data["proficiencies"] = {
+        index: None if proficiency == srd_proficiency(index) else proficiency
+        for index, proficiency in character.proficiencies.items()
+    }
+    return data
+
+
+def from_compact_dict(data: dict[str, Any]) -> Character:
+    """
+    Create a character from a dict made by `compact_dict`, or by dict(character).
+    Like Character(**data), keys may be missing.
+    """
+    data = dict(data)
+    if "inventory" in data:
+        data["inventory"] = [
+            {**SRD_equipment[item["index"]], **item}
+            if item["index"] in SRD_equipment
+            else item
+            for item in data["inventory"]
+        ]
+    for key in ("cantrips_known", "spells_known", "spells_prepared"):
+        if key in data:
+            data[key] = [
+                SPELLS[spell] if isinstance(spell, str) else spell
+                for spell in data[key]
+            ]
+    if "class_features" in data:
+        data["class_features"] = {
+            index: SRD(f"/api/features/{index}") if feature is None else feature
+            for index, feature in data["class_features"].items()
+        }
+    if "proficiencies" in data:
+        data["proficiencies"] = {
+            index: srd_proficiency(index) if proficiency is None else proficiency
+            for index, proficiency in data["proficiencies"].items()
+        }
+    return Character(**data)
@@ -1,14 +1,13 @@
 import logging
-from typing import Union, Optional
+from collections.abc import Mapping
+from functools import lru_cache
+from typing import Any, Union, Optional
 from dataclasses import dataclass, asdict
-from .SRD import SRD, SRD_endpoints, SRD_classes
+from .SRD import SRD, SRDIndex, SRD_classes
 
 
 LOG = logging.getLogger(__package__)
-SRD_spells = {
-    spell["index"]: SRD(spell["url"])
-    for spell in SRD(SRD_endpoints["spells"])["results"]
-}
+SRD_spells = SRDIndex("spells")
 
 
 @dataclass(kw_only=True, frozen=True, slots=True)
@@ -47,9 +46,7 @@ class _SPELL:
             yield k, v
 
 
-SPELLS: dict[str, _SPELL] = {
-    index: _SPELL(**spell) for index, spell in SRD_spells.items()
-}
+SPELLS: Mapping[str, _SPELL] = SRDIndex("spells", lambda spell: _SPELL(**spell))
 
 
 class SpellList(list):
@@ -77,23 +74,45 @@ class SpellList(list):
         super().append(new_val)
 
 
-spell_names_by_level = {
-    i: [key for key, val in SRD_spells.items() if val["level"] == i] for i in range(10)
-}
+@lru_cache(maxsize=None)
+def get_spell_names_by_level() -> dict[int, list[str]]:
+    return {
+        i: [key for key, val in SRD_spells.items() if val["level"] == i]
+        for i in range(10)
+    }
 
-spell_names_by_class = {
-    i: [
-        key
-        for key, val in SRD_spells.items()
-        if i in (cindex["index"] for cindex in val["classes"])
-    ]
-    for i in SRD_classes.keys()
-}
+
+@lru_cache(maxsize=None)
+def get_spell_names_by_class() -> dict[str, list[str]]:
+    return {
+        i: [
+            key
+            for key, val in SRD_spells.items()
+            if i in (cindex["index"] for cindex in val["classes"])
+        ]
+        for i in SRD_classes.keys()
+    }
+
+
+def __getattr__(name: str) -> Any:
+    # spell_names_by_level and spell_names_by_class need every spell to be loaded,
+    # so they are only created when first used
+    if name == "spell_names_by_level":
+        return get_spell_names_by_level()
+    if name == "spell_names_by_class":
+        return get_spell_names_by_class()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def spells_for_class_level(classs: str, level: int) -> set:
     if level > 9 or level < 0:
         raise ValueError("Spell levels only go from 0-9")
-    return set(spell_names_by_class[classs]).intersection(
-        set(spell_names_by_level[level])
+    if classs not in SRD_classes:
+        # the same error whatever the store
+        raise KeyError(classs)
+    if hasattr(SRD.store, "query"):
+        # the store has secondary indexes (e.g. SQLite)
+        return set(SRD.store.query("spells", level=level, classs=classs))
+    return set(get_spell_names_by_class()[classs]).intersection(
+        set(get_spell_names_by_level()[level])
     )
@@ -0,0 +1,428 @@
+"""
+An asyncio client for the SRD API, for filling or refreshing a store of SRD documents
+
+Requests share a pool of keep-alive connections, at most `concurrency` run at
+once, and failed requests are retried with exponential backoff. Only the standard
+library is used, so this works without `requests` installed.
+
+The API is read from DND_SRD_API, so a local mirror can be used, e.g.:
+    DND_SRD_API=http://localhost:3000 python -m dnd_character.srd_tools warm
+"""
+import asyncio
+import gzip
+import hashlib
+import json
+import logging
+import ssl
+from dataclasses import dataclass, field
+from os import environ, path
+from typing import Iterable, Optional, TYPE_CHECKING
+from urllib.parse import urljoin, urlsplit
+from .srd_store import JsonCacheDirectory, SRDStore, atomic_write
+
+if TYPE_CHECKING:
+    from .SRD import JsonData
+
+
+LOG = logging.getLogger(__package__)
+
+DEFAULT_SRD_API = "http://dnd5eapi.co"
+# stored in the json_cache directory by `sync_directory`
+MANIFEST_FILENAME = "sync_manifest.json"
+REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class SRDRequestError(Exception):
+    pass
+
+
+@dataclass
+class Response:
+    status: int
+    headers: dict[str, str] = field(default_factory=dict)
+    body: bytes = b""
+
+    def json(self) -> "JsonData":
+        return json.loads(self.body)
+
+
+class _Connection:
+    """One keep-alive HTTP/1.1 connection"""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+
+    async def request(self, host: str, path: str, headers: dict[str, str]) -> Response:
+        lines = [f"GET {path} HTTP/1.1", f"Host: {host}"]
+        lines.extend(f"{key}: {value}" for key, value in headers.items())
+        self.writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionResetError("Connection closed by server")
+        status = int(status_line.split()[1])
+        response = Response(status)
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            key, _, value = line.decode("latin-1").partition(":")
+            response.headers[key.strip().lower()] = value.strip()
+
+        if response.headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int((await self.reader.readline()).split(b";")[0], 16)
+                if size == 0:
+                    await self.reader.readline()
+                    break
+                chunks.append(await self.reader.readexactly(size))
+                await self.reader.readline()
+            response.body = b"".join(chunks)
+        elif "content-length" in response.headers:
+            response.body = await self.reader.readexactly(
+                int(response.headers["content-length"])
+            )
+        elif status not in (204, 304):
+            response.body = await self.reader.read()
+            response.headers["connection"] = "close"
+
+        if response.headers.get("content-encoding") == "gzip":
+            response.body = gzip.decompress(response.body)
+        return response
+
+    @property
+    def reusable(self) -> bool:
+        return not self.writer.is_closing() and not self.reader.at_eof()
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+class AsyncSRDClient:
+    """
+    Fetch SRD documents concurrently. Use as an async context manager:
+
+        async with AsyncSRDClient() as client:
+            documents = await client.fetch_all(["/api/spells/fireball"])
+    """
+
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        *,
+        concurrency: int = 8,
+        retries: int = 3,
+        backoff: float = 0.5,
+        timeout: float = 30.0,
+    ):
+        self.base_url = (
+            base_url or environ.get("DND_SRD_API", DEFAULT_SRD_API)
+        ).rstrip("/")
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._idle: dict[tuple[str, int, bool], list[_Connection]] = {}
+
+    async def __aenter__(self) -> "AsyncSRDClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        for connections in self._idle.values():
+            for connection in connections:
+                connection.close()
+        self._idle.clear()
+
+    async def _connect(self, key: tuple[str, int, bool]) -> _Connection:
+        idle = self._idle.get(key)
+        while idle:
+            connection = idle.pop()
+            if connection.reusable:
+                return connection
+            connection.close()
+        host, port, secure = key
+        reader, writer = await asyncio.open_connection(
+            host, port, ssl=ssl.create_default_context() if secure else None
+        )
+        return _Connection(reader, writer)
+
+    async def _get_once(self, url: str, headers: dict[str, str]) -> Response:
+        parts = urlsplit(url)
+        secure = parts.scheme == "https"
+        key = (parts.hostname, parts.port or (443 if secure else 80), secure)
+        path = parts.path or "/"
+        if parts.query:
+            path += f"?{parts.query}"
+
+        connection = await self._connect(key)
+        try:
+            response = await asyncio.wait_for(
+                connection.request(parts.netloc, path, headers), self.timeout
+            )
+        except BaseException:
+            connection.close()
+            raise
+        if response.headers.get("connection", "").lower() == "close":
+            connection.close()
+        else:
+            self._idle.setdefault(key, []).append(connection)
+        return response
+
+    async def get(self, uri: str, headers: Optional[dict[str, str]] = None) -> Response:
+        """
+        GET a uri (e.g. /api/spells/fireball), following redirects and retrying
+        failed requests. Extra `headers` are sent with the request.
+        """
+        request_headers = {
+            "Accept": "application/json",
+            "Accept-Encoding": "gzip",
+            "Connection": "keep-alive",
+            **(headers or {}),
+        }
+        url = f"{self.base_url}{uri}"
+        async with self._semaphore:
+            attempt = 0
+            redirects = 0
+            while True:
+                try:
+                    response = await self._get_once(url, request_headers)
+                except (
+                    OSError,
+                    asyncio.TimeoutError,
+                    asyncio.IncompleteReadError,
+                ) as e:
+                    if attempt >= self.retries:
+                        raise SRDRequestError(f"GET {url} failed: {str(e)}") from e
+                    LOG.info(f"Retrying GET {url} after error: {str(e)}")
+                else:
+                    if response.status in REDIRECT_STATUSES and redirects < 5:
+                        url = urljoin(url, response.headers["location"])
+                        redirects += 1
+                        continue
+                    if response.status not in RETRY_STATUSES:
+                        return response
+                    if attempt >= self.retries:
+                        raise SRDRequestError(f"GET {url} returned {response.status}")
+                    LOG.info(f"Retrying GET {url} after status {response.status}")
+                await asyncio.sleep(self.backoff * 2**attempt)
+                attempt += 1
+
+    async def fetch_json(self, uri: str) -> "JsonData":
+        response = await self.get(uri)
+        if response.status != 200:
+            raise SRDRequestError(f"GET {uri} returned {response.status}")
+        return response.json()
+
+    async def fetch_all(self, uris: Iterable[str]) -> dict[str, "JsonData"]:
+        """Fetch many documents concurrently"""
+        uris = list(uris)
+        documents = await asyncio.gather(*(self.fetch_json(uri) for uri in uris))
+        return dict(zip(uris, documents))
+
+
+def referenced_uris(data: "JsonData") -> Iterable[str]:
+    """Yields every API uri referenced anywhere inside a document"""
+    if isinstance(data, dict):
+        data = data.values()
+    elif not isinstance(data, list):
+        if isinstance(data, str) and data.startswith("/api/"):
+            yield data
+        return
+    for value in data:
+        yield from referenced_uris(value)
+
+
+async def warm_store(
+    store: SRDStore,
+    uris: Iterable[str],
+    *,
+    refresh: bool = False,
+    follow: bool = False,
+    client: Optional[AsyncSRDClient] = None,
+) -> list[str]:
+    """
+    Fetch `uris` into `store` concurrently. Documents already in the store are
+    skipped unless `refresh` is True. If `follow` is True, every uri referenced
+    by a document is fetched too. Returns the uris which were fetched.
+    """
+    if store.readonly:
+        raise SRDRequestError("Can't fetch documents into a read-only store")
+    own_client = client is None
+    client = client or AsyncSRDClient()
+    seen: set[str] = set()
+    fetched: list[str] = []
+
+    async def visit(uri: str) -> None:
+        if uri in seen:
+            return
+        seen.add(uri)
+        data = None
+        if not refresh and uri in store:
+            if not follow:
+                return
+            try:
+                data = store.load(uri)
+            except KeyError:
+                pass
+        if data is None:
+            response = await client.get(uri)
+            if response.status == 404 and follow:
+                LOG.warning(f"Referenced uri not found: {uri}")
+                return
+            if response.status != 200:
+                raise SRDRequestError(f"GET {uri} returned {response.status}")
+            data = response.json()
+            store.save(uri, data)
+            fetched.append(uri)
+        if follow:
+            await asyncio.gather(*(visit(ref) for ref in referenced_uris(data)))
+
+    try:
+        await asyncio.gather(*(visit(uri) for uri in uris))
+    finally:
+        if own_client:
+            client.close()
+    return fetched
+
+
+def warm_cache(
+    uris: Optional[Iterable[str]] = None,
+    *,
+    refresh: bool = False,
+    follow: bool = False,
+    concurrency: int = 8,
+    base_url: Optional[str] = None,
+) -> list[str]:
+    """
+    Fill the store behind SRD() from the API in parallel. `uris` defaults to
+    every uri in the store, or to crawling from /api/ when the store is empty.
+    Uris already in the store are only fetched again if `refresh` is True, so
+    by default a full store only gets the missing documents it references
+    (with `follow`). Returns the uris which were fetched.
+    """
+    from .SRD import SRD
+
+    if uris is None:
+        uris = list(SRD.store)
+        if not uris:
+            uris, follow = ["/api/"], True
+
+    async def run() -> list[str]:
+        async with AsyncSRDClient(base_url, concurrency=concurrency) as client:
+            return await warm_store(
+                SRD.store, uris, refresh=refresh, follow=follow, client=client
+            )
+
+    fetched = asyncio.run(run())
+    for uri in fetched:
+        # forget the old version of refreshed documents
+        SRD.cache.pop(uri, None)
+    return fetched
+
+
+@dataclass
+class SyncReport:
+    changed: list[str] = field(default_factory=list)
+    unchanged: list[str] = field(default_factory=list)
+    not_found: list[str] = field(default_factory=list)
+
+
+def document_hash(data: "JsonData") -> str:
+    """sha256 of a document as it is written into a store"""
+    return hashlib.sha256(json.dumps(data).encode()).hexdigest()
+
+
+async def sync_store(
+    store: SRDStore,
+    manifest: dict[str, dict[str, str]],
+    uris: Iterable[str],
+    client: AsyncSRDClient,
+) -> SyncReport:
+    """
+    Download the documents in `uris` which changed since the last sync.
+    `manifest` holds the ETag, Last-Modified and sha256 of each document,
+    used for conditional requests; it is updated in place. Documents are
+    only written to `store` when their content changed.
+    """
+    report = SyncReport()
+
+    async def sync(uri: str) -> None:
+        entry = manifest.get(uri, {})
+        headers = {}
+        if uri in store:
+            if "etag" in entry:
+                headers["If-None-Match"] = entry["etag"]
+            if "last_modified" in entry:
+                headers["If-Modified-Since"] = entry["last_modified"]
+        response = await client.get(uri, headers)
+        if response.status == 304:
+            report.unchanged.append(uri)
+            return
+        if response.status == 404:
+            LOG.warning(f"Not found while syncing: {uri}")
+            report.not_found.append(uri)
+            return
+        if response.status != 200:
+            raise SRDRequestError(f"GET {uri} returned {response.status}")
+
+        data = response.json()
+        new_entry = {"sha256": document_hash(data)}
+        if "etag" in response.headers:
+            new_entry["etag"] = response.headers["etag"]
+        if "last-modified" in response.headers:
+            new_entry["last_modified"] = response.headers["last-modified"]
+
+        old_hash = entry.get("sha256")
+        if old_hash is None and uri in store:
+            try:
+                old_hash = document_hash(store.load(uri))
+            except KeyError:
+                pass
+        if old_hash == new_entry["sha256"] and uri in store:
+            report.unchanged.append(uri)
+        else:
+            store.save(uri, data)
+            report.changed.append(uri)
+        manifest[uri] = new_entry
+
+    await asyncio.gather(*(sync(uri) for uri in uris))
+    return report
+
+
+def sync_directory(
+    directory: str,
+    uris: Optional[Iterable[str]] = None,
+    *,
+    concurrency: int = 8,
+    base_url: Optional[str] = None,
+) -> SyncReport:
+    """
+    Re-sync a json_cache directory against the API, downloading only documents
+    which changed. By default every document in the directory is checked.
+    The manifest is saved to `MANIFEST_FILENAME` inside the directory.
+    """
+    store = JsonCacheDirectory(directory)
+    manifest_path = path.join(directory, MANIFEST_FILENAME)
+    try:
+        with open(manifest_path, "r") as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, json.decoder.JSONDecodeError):
+        manifest = {}
+    uris = list(store) if uris is None else list(uris)
+
+    async def run() -> SyncReport:
+        async with AsyncSRDClient(base_url, concurrency=concurrency) as client:
+            return await sync_store(store, manifest, uris, client)
+
+    try:
+        return asyncio.run(run())
+    finally:
+        # keep what was learned even if some requests failed
+        atomic_write(manifest_path, json.dumps(manifest, indent=1, sort_keys=True))
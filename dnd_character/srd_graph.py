@@ -0,0 +1,87 @@
+"""
+Class data from the SRD with its cross-references already followed
+
+SRD documents refer to each other by url (e.g. a class level lists the urls of
+its features). The functions here follow those references once per class and
+return tuples holding the referenced documents directly, so that Character
+doesn't call SRD(url) for every reference each time a character is created.
+
+Classes and class levels which don't come from the SRD (e.g. a custom _CLASS)
+are resolved each time instead of being cached.
+"""
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional, TYPE_CHECKING
+from .SRD import SRD, SRD_classes, SRD_class_levels, JsonData
+
+if TYPE_CHECKING:
+    from .classes import _CLASS
+
+
+@dataclass(frozen=True, slots=True)
+class ResolvedClassLevel:
+    """A document from /api/classes/{index}/levels, with its features loaded"""
+
+    level: int
+    data: JsonData
+    # (index, document) of each class feature gained at this level
+    features: tuple[tuple[str, JsonData], ...]
+
+
+def resolve_class_levels(
+    class_levels: list[JsonData],
+) -> tuple[ResolvedClassLevel, ...]:
+    return tuple(
+        ResolvedClassLevel(
+            data["level"],
+            data,
+            tuple((feat["index"], SRD(feat["url"])) for feat in data["features"]),
+        )
+        for data in class_levels
+    )
+
+
+@lru_cache(maxsize=None)
+def srd_class_levels(class_index: str) -> tuple[ResolvedClassLevel, ...]:
+    return resolve_class_levels(SRD_class_levels[class_index])
+
+
+def class_levels(
+    class_index: Optional[str], levels: list[JsonData]
+) -> tuple[ResolvedClassLevel, ...]:
+    """Resolved version of `levels`, the class levels of `class_index`"""
+    if levels is SRD_class_levels.get(class_index):
+        return srd_class_levels(class_index)
+    return resolve_class_levels(levels)
+
+
+def resolve_proficiencies(
+    proficiencies: list[dict[str, str]]
+) -> tuple[tuple[str, str, str], ...]:
+    result = []
+    for proficiency in proficiencies:
+        data = SRD(proficiency["url"])
+        result.append((proficiency["index"], data["name"], data["type"]))
+    return tuple(result)
+
+
+@lru_cache(maxsize=None)
+def srd_class_proficiencies(class_index: str) -> tuple[tuple[str, str, str], ...]:
+    return resolve_proficiencies(SRD_classes[class_index]["proficiencies"])
+
+
+def class_proficiencies(classs: "_CLASS") -> tuple[tuple[str, str, str], ...]:
+    """(index, name, type) of each proficiency of a class"""
+    srd_class = SRD_classes.get(classs.index)
+    if srd_class is not None and (
+        classs.proficiencies is srd_class["proficiencies"]
+        or classs.proficiencies == srd_class["proficiencies"]
+    ):
+        return srd_class_proficiencies(classs.index)
+    return resolve_proficiencies(classs.proficiencies)
+
+
+@lru_cache(maxsize=None)
+def equipment_category_names(url: str) -> tuple[str, ...]:
+    """Names of the equipment in an equipment category"""
+    return tuple(equipment["name"] for equipment in SRD(url)["equipment"])
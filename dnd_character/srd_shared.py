@@ -0,0 +1,31 @@
+"""
+Share the parsed SRD documents with the worker processes of a multiprocessing pool
+
+Parsed documents can't be shared between processes, only inherited by forking.
+If the workers are forked and use most of the SRD, calling `preload_srd` before
+starting the pool parses every document once in the parent, and each worker
+reads the parent's memory pages instead of parsing its own copy:
+
+    preload_srd()
+    with multiprocessing.get_context("fork").Pool() as pool:
+        ...
+
+Workers which only use a few documents (e.g. to create characters) gain little:
+with 4 workers, benchmarks/bench_shared_memory.py measured about the same
+private memory per worker (4.9 MB preloaded, 5.1 MB without), and a larger
+proportional share of memory (PSS: 9.2 MB against 7.6 MB), since each worker
+also counts a share of the parent's documents it never uses.
+"""
+import gc
+from .SRD import SRD
+
+
+def preload_srd() -> None:
+    """
+    Parse every document in this process, before forking workers which will
+    use most of the SRD. The parsed documents are moved out of reach of the
+    garbage collector (gc.freeze), so that forked workers share their memory
+    pages instead of copying them when the collector runs.
+    """
+    SRD.load_all()
+    gc.freeze()
@@ -0,0 +1,200 @@
+"""
+An SQLite database store for SRD documents, with secondary indexes
+
+Each document is stored as JSON alongside indexed columns, so questions like
+"all level 3 wizard spells" are answered without parsing any other documents.
+
+Build a database from the json_cache with:
+    python -m dnd_character.srd_tools sqlite dnd_character/json_cache srd.sqlite
+and use it by setting DND_SRD_STORE=srd.sqlite
+"""
+import json
+import sqlite3
+import logging
+from pathlib import Path
+from typing import Iterator, Optional, TYPE_CHECKING
+from .srd_store import JsonCacheDirectory, SRDStore, DOCUMENT_ERRORS
+
+if TYPE_CHECKING:
+    from .SRD import JsonData
+
+
+LOG = logging.getLogger(__package__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    uri TEXT PRIMARY KEY,
+    type TEXT NOT NULL,
+    "index" TEXT,
+    level INTEGER,
+    challenge_rating REAL,
+    equipment_category TEXT,
+    body TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS document_classes (
+    class TEXT NOT NULL,
+    uri TEXT NOT NULL REFERENCES documents(uri) ON DELETE CASCADE,
+    PRIMARY KEY (class, uri)
+);
+CREATE INDEX IF NOT EXISTS documents_by_type ON documents(type, "index");
+CREATE INDEX IF NOT EXISTS documents_by_level ON documents(type, level);
+CREATE INDEX IF NOT EXISTS documents_by_challenge_rating
+    ON documents(type, challenge_rating);
+CREATE INDEX IF NOT EXISTS documents_by_equipment_category
+    ON documents(equipment_category);
+"""
+
+
+def document_columns(uri: str, data: "JsonData") -> tuple:
+    """
+    Returns the indexed columns of a document:
+    (type, index, level, challenge_rating, equipment_category, classes)
+    where type is the API endpoint (e.g. "spells" for /api/spells/fireball)
+    """
+    parts = uri.strip("/").split("/")
+    doc_type = parts[1] if len(parts) > 1 else ""
+    if not isinstance(data, dict):
+        # e.g. the list of levels for a class
+        return doc_type, None, None, None, None, []
+
+    classes = [ref["index"] for ref in data.get("classes", []) if "index" in ref]
+    if isinstance(data.get("class"), dict):
+        classes.append(data["class"]["index"])
+    level = data.get("level")
+    equipment_category = data.get("equipment_category")
+    return (
+        doc_type,
+        data.get("index"),
+        level if isinstance(level, int) else None,
+        data.get("challenge_rating"),
+        equipment_category["index"] if isinstance(equipment_category, dict) else None,
+        classes,
+    )
+
+
+class SQLiteJsonCache(SRDStore):
+    """
+    A store backed by an SQLite database file. Use `query` to find documents
+    by their indexed columns without loading any documents.
+    The connection is shared by all threads, so writes hold a lock.
+    The database must exist, unless `create` is True (see `build_sqlite`).
+    """
+
+    readonly = False
+
+    def __init__(self, filepath: str, create: bool = False):
+        super().__init__()
+        self.filepath = filepath
+        if not create and not Path(filepath).is_file():
+            raise FileNotFoundError(
+                f"No SQLite database at {filepath}. Build one with: python -m"
+                " dnd_character.srd_tools sqlite dnd_character/json_cache"
+                f" {filepath}"
+            )
+        # with mode=rw, SQLite doesn't create a database which has been removed
+        mode = "rwc" if create else "rw"
+        self.connection = sqlite3.connect(
+            f"{Path(filepath).absolute().as_uri()}?mode={mode}",
+            uri=True,
+            check_same_thread=False,
+        )
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        self.connection.executescript(SCHEMA)
+
+    def __contains__(self, uri: str) -> bool:
+        cursor = self.connection.execute(
+            "SELECT 1 FROM documents WHERE uri = ?", (uri,)
+        )
+        return cursor.fetchone() is not None
+
+    def __iter__(self) -> Iterator[str]:
+        cursor = self.connection.execute("SELECT uri FROM documents")
+        return (row[0] for row in cursor.fetchall())
+
+    def __len__(self) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def load(self, uri: str) -> "JsonData":
+        row = self.connection.execute(
+            "SELECT body FROM documents WHERE uri = ?", (uri,)
+        ).fetchone()
+        if row is None:
+            raise KeyError(uri)
+        return json.loads(row[0])
+
+    def save(self, uri: str, data: "JsonData", commit: bool = True) -> None:
+        *columns, classes = document_columns(uri, data)
+        with self.lock():
+            self.connection.execute(
+                "INSERT OR REPLACE INTO documents VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (uri, *columns, json.dumps(data)),
+            )
+            self.connection.execute(
+                "DELETE FROM document_classes WHERE uri = ?", (uri,)
+            )
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO document_classes VALUES (?, ?)",
+                [(classs, uri) for classs in classes],
+            )
+            if commit:
+                self.connection.commit()
+
+    def query(
+        self,
+        doc_type: str,
+        *,
+        level: Optional[int] = None,
+        classs: Optional[str] = None,
+        min_challenge_rating: Optional[float] = None,
+        max_challenge_rating: Optional[float] = None,
+        equipment_category: Optional[str] = None,
+    ) -> list[str]:
+        """
+        Returns the indexes of documents of `doc_type` (e.g. "spells") which match
+        all of the given filters. Only the database indexes are read.
+        """
+        sql = 'SELECT documents."index" FROM documents'
+        where = ["documents.type = ?"]
+        params: list = [doc_type]
+        if classs is not None:
+            sql += " JOIN document_classes USING (uri)"
+            where.append("document_classes.class = ?")
+            params.append(classs)
+        if level is not None:
+            where.append("documents.level = ?")
+            params.append(level)
+        if min_challenge_rating is not None:
+            where.append("documents.challenge_rating >= ?")
+            params.append(min_challenge_rating)
+        if max_challenge_rating is not None:
+            where.append("documents.challenge_rating <= ?")
+            params.append(max_challenge_rating)
+        if equipment_category is not None:
+            where.append("documents.equipment_category = ?")
+            params.append(equipment_category)
+        sql += f" WHERE {' AND '.join(where)} ORDER BY documents.uri"
+        return [row[0] for row in self.connection.execute(sql, params)]
+
+    def close(self) -> None:
+        self.connection.close()
+
+
+def build_sqlite(directory: str, destination: str) -> int:
+    """
+    Copy every document from a json_cache directory into an SQLite database.
+    Returns the number of documents.
+    """
+    source = JsonCacheDirectory(directory)
+    database = SQLiteJsonCache(destination, create=True)
+    num = 0
+    for uri in sorted(source):
+        try:
+            data = json.loads(source.read(uri))
+        except DOCUMENT_ERRORS as e:
+            LOG.error(f"{uri} was not copied: {str(e)}")
+            continue
+        database.save(uri, data, commit=False)
+        num += 1
+    database.connection.commit()
+    database.close()
+    return num
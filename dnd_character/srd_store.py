@@ -0,0 +1,655 @@
+"""
+Stores hold the SRD documents behind SRD(), keyed by API uri (e.g. /api/spells/fireball)
+
+A store is indexed when it is created, but documents are only parsed
+the first time they're loaded. SRD() keeps the parsed documents in memory.
+
+Every store is an SRDStore. `open_store` opens a json_cache directory, a zip
+archive, a packed file or an SQLite database, or creates an in-memory store.
+
+Pack the json_cache into a single file with:
+    python -m dnd_character.srd_tools pack dnd_character/json_cache srd.pack
+and use it by setting DND_SRD_STORE=srd.pack
+
+Documents may be compressed: as api_*.json.gz files in a json_cache directory,
+or in a zip archive. They are decompressed when loaded.
+
+Or pre-parse the json_cache into a snapshot which SRD.load_all() (and so
+DND_SRD_EAGER=1) loads in one read:
+    python -m dnd_character.srd_tools snapshot dnd_character/json_cache
+"""
+import gzip
+import hashlib
+import json
+import logging
+import marshal
+import mmap
+import struct
+import sys
+import tempfile
+import threading
+import zipfile
+import zlib
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from os import scandir, remove, replace, chmod, fsync, path, access, makedirs, W_OK
+from typing import Iterator, Optional, TYPE_CHECKING, Union
+
+try:
+    import fcntl
+except ModuleNotFoundError:
+    # not available on Windows, where writes are only locked within this process
+    fcntl = None
+
+if TYPE_CHECKING:
+    from .SRD import JsonData
+
+
+LOG = logging.getLogger(__package__)
+
+# the json_cache of the package, which may be inside a zip archive (e.g. a zipapp)
+JSON_CACHE = path.join(path.dirname(path.abspath(__file__)), "json_cache")
+
+
+def atomic_write(filepath: str, data: Union[str, bytes]) -> None:
+    """
+    Write to a temporary file in the same directory, then rename it to `filepath`.
+    A crash can't leave a partially written file at `filepath`.
+    """
+    fd, tmp_filepath = tempfile.mkstemp(
+        dir=path.dirname(filepath) or ".", prefix=".tmp_"
+    )
+    try:
+        with open(fd, "wb" if isinstance(data, bytes) else "w") as f:
+            f.write(data)
+            f.flush()
+            fsync(f.fileno())
+        chmod(tmp_filepath, 0o644)
+        replace(tmp_filepath, filepath)
+    except BaseException:
+        remove(tmp_filepath)
+        raise
+
+
+def uri_to_filename(uri: str) -> str:
+    """/api/spells/fireball -> api_spells_fireball.json"""
+    return f"{uri[1:].replace('/', '_')}.json"
+
+
+def filename_to_uri(filename: str) -> str:
+    """api_spells_fireball.json (or .json.gz) -> /api/spells/fireball"""
+    return f"/{filename.removesuffix(GZIP_SUFFIX).replace('_', '/')[:-5]}"
+
+
+# suffix of a gzip-compressed document, e.g. api_spells_fireball.json.gz
+GZIP_SUFFIX = ".gz"
+
+
+def is_document_filename(filename: str) -> bool:
+    return filename.startswith("api_") and filename.endswith((".json", ".json.gz"))
+
+
+def read_document(filepath: str) -> bytes:
+    """Read the JSON of a document file, decompressing it if it's gzipped"""
+    if filepath.endswith(GZIP_SUFFIX):
+        with gzip.open(filepath, "rb") as f:
+            return f.read()
+    with open(filepath, "rb") as f:
+        return f.read()
+
+
+# errors raised by a truncated or corrupt document file
+DOCUMENT_ERRORS = (json.decoder.JSONDecodeError, gzip.BadGzipFile, EOFError, zlib.error)
+
+
+class SRDStore(ABC):
+    """
+    Base class of the stores behind SRD(). A store is a collection of uris
+    and `load` parses the document for a uri, raising KeyError if it isn't stored.
+    Stores are read-only unless a subclass implements `save`.
+    """
+
+    readonly = True
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    @abstractmethod
+    def __contains__(self, uri: str) -> bool:
+        ...
+
+    @abstractmethod
+    def __iter__(self) -> Iterator[str]:
+        ...
+
+    @abstractmethod
+    def __len__(self) -> int:
+        ...
+
+    @abstractmethod
+    def load(self, uri: str) -> "JsonData":
+        ...
+
+    def read(self, uri: str) -> bytes:
+        """The JSON of a document. Stores holding JSON return it without parsing"""
+        return json.dumps(self.load(uri)).encode()
+
+    def save(self, uri: str, data: "JsonData") -> None:
+        raise NotImplementedError(f"{type(self).__name__} is read-only")
+
+    @contextmanager
+    def lock(self) -> Iterator[None]:
+        """Exclusive lock on writing to this store, across threads"""
+        with self._lock:
+            yield
+
+    def close(self) -> None:
+        pass
+
+
+class MemoryStore(SRDStore):
+    """
+    Documents kept in a dict, e.g. for tests, or so that API responses
+    are never written to disk (DND_SRD_STORE=:memory:)
+
+    Documents which aren't in the dict are read from the `base` store, if any,
+    which is never written to.
+    """
+
+    readonly = False
+
+    def __init__(
+        self,
+        documents: Optional[dict[str, "JsonData"]] = None,
+        base: Optional[SRDStore] = None,
+    ):
+        super().__init__()
+        self.documents: dict[str, "JsonData"] = dict(documents or {})
+        self.base = base
+
+    def __contains__(self, uri: str) -> bool:
+        return uri in self.documents or (self.base is not None and uri in self.base)
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self.documents
+        if self.base is not None:
+            for uri in self.base:
+                if uri not in self.documents:
+                    yield uri
+
+    def __len__(self) -> int:
+        if self.base is None:
+            return len(self.documents)
+        return sum(1 for _ in self)
+
+    def load(self, uri: str) -> "JsonData":
+        try:
+            return self.documents[uri]
+        except KeyError:
+            if self.base is None:
+                raise
+        return self.base.load(uri)
+
+    def read(self, uri: str) -> bytes:
+        if uri in self.documents or self.base is None:
+            return super().read(uri)
+        return self.base.read(uri)
+
+    def save(self, uri: str, data: "JsonData") -> None:
+        self.documents[uri] = data
+
+    def close(self) -> None:
+        if self.base is not None:
+            self.base.close()
+
+
+# created inside a json_cache directory to lock it while writing
+LOCK_FILENAME = ".lock"
+
+
+class JsonCacheDirectory(SRDStore):
+    """
+    A directory containing one `api_*.json` or `api_*.json.gz` file per SRD document.
+    Only the filenames are read when this object is created.
+    Writes are locked across threads and processes sharing the directory.
+    The store is read-only if the directory isn't writable.
+
+    New documents are gzipped if `compress` is True, which defaults to True
+    when every document in the directory is already gzipped.
+    """
+
+    def __init__(self, directory: str, compress: Optional[bool] = None):
+        super().__init__()
+        self.directory = directory
+        self.readonly = not access(directory, W_OK)
+        self.files: dict[str, str] = {}
+        num_gzipped = 0
+        with scandir(directory) as entries:
+            for entry in entries:
+                if not is_document_filename(entry.name):
+                    continue
+                uri = filename_to_uri(entry.name)
+                if entry.name.endswith(GZIP_SUFFIX):
+                    num_gzipped += 1
+                    # an uncompressed file of the same document takes precedence
+                    self.files.setdefault(uri, entry.path)
+                else:
+                    self.files[uri] = entry.path
+        if compress is None:
+            compress = num_gzipped > 0 and num_gzipped == len(self.files)
+        self.compress = compress
+
+    def __contains__(self, uri: str) -> bool:
+        return uri in self.files
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.files)
+
+    def __len__(self) -> int:
+        return len(self.files)
+
+    def load(self, uri: str) -> "JsonData":
+        """
+        Parse the document for `uri`. Raises KeyError if it is not in the store.
+        A file which fails to parse is deleted so it can be fetched again.
+        """
+        fp = self.files.get(uri)
+        if fp is None:
+            # another process may have saved it since this directory was indexed
+            fp = path.join(self.directory, uri_to_filename(uri))
+            if not path.exists(fp):
+                fp += GZIP_SUFFIX
+                if not path.exists(fp):
+                    raise KeyError(uri)
+            self.files[uri] = fp
+        try:
+            return json.loads(read_document(fp))
+        except FileNotFoundError as e:
+            self.files.pop(uri, None)
+            raise KeyError(uri) from e
+        except DOCUMENT_ERRORS as e:
+            LOG.error(f"{path.basename(fp)} failed to load: {str(e)}")
+            if not self.readonly:
+                with self.lock():
+                    # another thread or process may have removed the file, or
+                    # saved the document again, since it was read
+                    try:
+                        return json.loads(read_document(fp))
+                    except FileNotFoundError:
+                        pass
+                    except DOCUMENT_ERRORS:
+                        try:
+                            remove(fp)
+                        except FileNotFoundError:
+                            pass
+            self.files.pop(uri, None)
+            raise KeyError(uri) from e
+
+    def read(self, uri: str) -> bytes:
+        """The JSON of a document, without parsing it"""
+        return read_document(self.files[uri])
+
+    def save(self, uri: str, data: "JsonData") -> None:
+        fp = path.join(self.directory, uri_to_filename(uri))
+        other_fp = fp + GZIP_SUFFIX
+        text = json.dumps(data)
+        if self.compress:
+            fp, other_fp = other_fp, fp
+        with self.lock():
+            atomic_write(
+                fp, gzip.compress(text.encode(), mtime=0) if self.compress else text
+            )
+            # don't leave the other format of this document behind, out of date
+            if path.exists(other_fp):
+                remove(other_fp)
+        self.files[uri] = fp
+
+    @contextmanager
+    def lock(self) -> Iterator[None]:
+        """Exclusive lock on writing to this directory, across threads and processes"""
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            with open(path.join(self.directory, LOCK_FILENAME), "a") as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+
+SNAPSHOT_FILENAME = "snapshot.marshal"
+SNAPSHOT_VERSION = 1
+# byte length of the marshalled header, which is followed by the documents
+SNAPSHOT_HEADER = struct.Struct("<I")
+
+
+def json_cache_signature(directory: str) -> str:
+    """Hash of the name, size and modification time of each document"""
+    entries = sorted(
+        (entry.name, entry.stat().st_size, entry.stat().st_mtime_ns)
+        for entry in scandir(directory)
+        if is_document_filename(entry.name)
+    )
+    return hashlib.sha256(repr(entries).encode()).hexdigest()
+
+
+def json_cache_content_hash(directory: str) -> str:
+    """Hash of the name and contents of each document"""
+    content_hash = hashlib.sha256()
+    for name in sorted(
+        entry.name for entry in scandir(directory) if is_document_filename(entry.name)
+    ):
+        with open(path.join(directory, name), "rb") as f:
+            content_hash.update(name.encode() + b"\0" + f.read() + b"\0")
+    return content_hash.hexdigest()
+
+
+def build_snapshot(directory: str, destination: Optional[str] = None) -> int:
+    """
+    Parse every document in a json_cache directory and save them with marshal,
+    along with a content hash of the JSON files. The snapshot is saved inside
+    the directory by default. Returns the number of documents.
+    """
+    destination = destination or path.join(directory, SNAPSHOT_FILENAME)
+    signature = json_cache_signature(directory)
+    content_hash = json_cache_content_hash(directory)
+    store = JsonCacheDirectory(directory)
+    documents = {}
+    for uri in store:
+        try:
+            documents[uri] = json.loads(store.read(uri))
+        except DOCUMENT_ERRORS as e:
+            LOG.error(f"{uri} was not added to the snapshot: {str(e)}")
+    header = marshal.dumps(
+        (SNAPSHOT_VERSION, sys.version_info[:2], content_hash, signature)
+    )
+    atomic_write(
+        destination,
+        SNAPSHOT_HEADER.pack(len(header)) + header + marshal.dumps(documents),
+    )
+    return len(documents)
+
+
+def load_snapshot(
+    directory: str, snapshot: Optional[str] = None
+) -> Optional[dict[str, "JsonData"]]:
+    """
+    Returns every document from the snapshot of a json_cache directory, or None
+    if there is no snapshot or its content hash doesn't match the JSON files.
+    """
+    snapshot = snapshot or path.join(directory, SNAPSHOT_FILENAME)
+    try:
+        with open(snapshot, "rb") as f:
+            data = memoryview(f.read())
+    except FileNotFoundError:
+        return None
+    try:
+        (header_length,) = SNAPSHOT_HEADER.unpack_from(data)
+        header_end = SNAPSHOT_HEADER.size + header_length
+        version, python_version, content_hash, signature = marshal.loads(
+            data[SNAPSHOT_HEADER.size : header_end]
+        )
+    except (struct.error, EOFError, ValueError, TypeError):
+        LOG.warning(f"{snapshot} is not a valid snapshot")
+        return None
+    if version != SNAPSHOT_VERSION or tuple(python_version) != sys.version_info[:2]:
+        LOG.info(f"{snapshot} was built by another version; parsing JSON instead")
+        return None
+    # The signature is cheaper to check than the content hash, but changes
+    # whenever files are touched (e.g. by a fresh checkout)
+    current_signature = json_cache_signature(directory)
+    if signature != current_signature:
+        if content_hash != json_cache_content_hash(directory):
+            LOG.info(f"{snapshot} is out of date; parsing JSON instead")
+            return None
+        # the files were only touched: save their signature so that
+        # the content isn't hashed again next time
+        header = marshal.dumps(
+            (version, python_version, content_hash, current_signature)
+        )
+        try:
+            atomic_write(
+                snapshot,
+                SNAPSHOT_HEADER.pack(len(header)) + header + data[header_end:],
+            )
+        except OSError as e:
+            LOG.info(f"The signature of {snapshot} was not updated: {str(e)}")
+    return marshal.loads(data[header_end:])
+
+
+PACK_MAGIC = b"DNDSRDP1"
+# magic, then the byte length of the JSON index which follows it
+PACK_HEADER = struct.Struct("<8sQ")
+
+
+def pack_documents(store: SRDStore) -> tuple[bytes, int]:
+    """
+    Pack every document in a store into one buffer:
+    a header, a JSON index of {uri: [offset, length]}, then the documents.
+    Offsets are relative to the end of the index.
+    Returns the buffer and the number of documents.
+    """
+    index: dict[str, list[int]] = {}
+    documents: list[bytes] = []
+    offset = 0
+    for uri in sorted(store):
+        try:
+            document = store.read(uri)
+            json.loads(document)
+        except (KeyError, *DOCUMENT_ERRORS) as e:
+            LOG.error(f"{uri} was not packed: {str(e)}")
+            continue
+        index[uri] = [offset, len(document)]
+        documents.append(document)
+        offset += len(document)
+
+    index_bytes = json.dumps(index, separators=(",", ":")).encode()
+    header = PACK_HEADER.pack(PACK_MAGIC, len(index_bytes))
+    return b"".join([header, index_bytes, *documents]), len(index)
+
+
+def pack_json_cache(directory: str, destination: str) -> int:
+    """
+    Pack every document in a json_cache directory into one file (see `pack_documents`)
+    Returns the number of documents.
+    """
+    data, num = pack_documents(JsonCacheDirectory(directory))
+    atomic_write(destination, data)
+    return num
+
+
+class PackedJsonCache(SRDStore):
+    """
+    A file created by `pack_json_cache`. The file is memory-mapped and only the
+    index is parsed when this object is created; documents are decoded when loaded.
+    """
+
+    def __init__(self, filepath: str):
+        super().__init__()
+        self.filepath = filepath
+        with open(filepath, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, index_length = PACK_HEADER.unpack_from(self._mmap)
+        if magic != PACK_MAGIC:
+            raise ValueError(f"{filepath} is not a packed SRD json_cache")
+        self._data_start = PACK_HEADER.size + index_length
+        self.offsets: dict[str, list[int]] = json.loads(
+            self._mmap[PACK_HEADER.size : self._data_start]
+        )
+
+    def __contains__(self, uri: str) -> bool:
+        return uri in self.offsets
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.offsets)
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def read(self, uri: str) -> bytes:
+        offset, length = self.offsets[uri]
+        start = self._data_start + offset
+        return self._mmap[start : start + length]
+
+    def load(self, uri: str) -> "JsonData":
+        return json.loads(self.read(uri))
+
+    def close(self) -> None:
+        self._mmap.close()
+
+
+def gzip_json_cache(directory: str, destination: Optional[str] = None) -> int:
+    """
+    Gzip every document in a json_cache directory into `destination`,
+    which is created if needed. By default the documents are compressed in place,
+    replacing the uncompressed files. Returns the number of documents.
+    """
+    destination = destination or directory
+    if not path.isdir(destination):
+        makedirs(destination)
+    store = JsonCacheDirectory(directory)
+    compressed = JsonCacheDirectory(destination, compress=True)
+    num = 0
+    for uri in sorted(store):
+        try:
+            document = store.read(uri)
+            json.loads(document)
+        except DOCUMENT_ERRORS as e:
+            LOG.error(f"{uri} was not compressed: {str(e)}")
+            continue
+        fp = path.join(destination, uri_to_filename(uri))
+        with compressed.lock():
+            atomic_write(fp + GZIP_SUFFIX, gzip.compress(document, 9, mtime=0))
+            if path.exists(fp):
+                remove(fp)
+        num += 1
+    return num
+
+
+# compression methods of zip archives, by name
+ZIP_COMPRESSION = {
+    "stored": zipfile.ZIP_STORED,
+    "deflated": zipfile.ZIP_DEFLATED,
+    "bzip2": zipfile.ZIP_BZIP2,
+    "lzma": zipfile.ZIP_LZMA,
+}
+
+
+def zip_json_cache(
+    directory: str, destination: str, compression: str = "deflated"
+) -> int:
+    """
+    Copy every document in a json_cache directory into a zip archive,
+    which can be used by setting DND_SRD_STORE. `compression` is one of
+    ZIP_COMPRESSION. Returns the number of documents.
+    """
+    store = JsonCacheDirectory(directory)
+    fd, tmp_filepath = tempfile.mkstemp(
+        dir=path.dirname(destination) or ".", prefix=".tmp_"
+    )
+    try:
+        with open(fd, "wb") as f, zipfile.ZipFile(
+            f, "w", ZIP_COMPRESSION[compression]
+        ) as archive:
+            for uri in sorted(store):
+                archive.writestr(uri_to_filename(uri), store.read(uri))
+        chmod(tmp_filepath, 0o644)
+        replace(tmp_filepath, destination)
+    except BaseException:
+        remove(tmp_filepath)
+        raise
+    return len(store)
+
+
+class ZipJsonCache(SRDStore):
+    """
+    A zip archive of json_cache files, which are read without extracting them.
+    `directory` is the directory inside the archive containing the files, e.g.
+    "dnd_character/json_cache" when the package is run from a zipapp.
+    """
+
+    def __init__(self, filepath: str, directory: str = ""):
+        super().__init__()
+        self.filepath = filepath
+        self._zipfile = zipfile.ZipFile(filepath)
+        prefix = f"{directory.strip('/')}/" if directory.strip("/") else ""
+        self.members: dict[str, str] = {}
+        for name in self._zipfile.namelist():
+            if not name.startswith(prefix):
+                continue
+            filename = name[len(prefix) :]
+            if filename.startswith("api_") and filename.endswith(".json"):
+                self.members[filename_to_uri(filename)] = name
+
+    def __contains__(self, uri: str) -> bool:
+        return uri in self.members
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.members)
+
+    def __len__(self) -> int:
+        return len(self.members)
+
+    def read(self, uri: str) -> bytes:
+        return self._zipfile.read(self.members[uri])
+
+    def load(self, uri: str) -> "JsonData":
+        return json.loads(self.read(uri))
+
+    def close(self) -> None:
+        self._zipfile.close()
+
+
+def find_zip_archive(location: str) -> Optional[tuple[str, str]]:
+    """
+    If `location` is a path inside a zip archive (e.g. in a zipapp), returns
+    the path of the archive and the directory inside it. Otherwise None.
+    """
+    archive, directory = location, ""
+    while not path.exists(archive):
+        archive, name = path.split(archive)
+        if not name:
+            return None
+        directory = f"{name}/{directory}"
+    if path.isfile(archive) and zipfile.is_zipfile(archive):
+        return archive, directory
+    return None
+
+
+SQLITE_EXTENSIONS = (".db", ".sqlite", ".sqlite3")
+MEMORY_STORE = ":memory:"
+
+
+def open_store(location: str) -> SRDStore:
+    """
+    Open the store at `location`: a json_cache directory, a zip archive,
+    an existing SQLite database (ending with .db, .sqlite or .sqlite3, see
+    `build_sqlite`) or a packed file.
+    A path inside a zip archive opens that directory of the archive.
+    ":memory:" is a MemoryStore reading the json_cache of the package, which
+    keeps new documents in memory. Any other path without an extension
+    which doesn't exist yet is created as a json_cache directory.
+    """
+    if location == MEMORY_STORE:
+        if path.isdir(JSON_CACHE) or find_zip_archive(JSON_CACHE) is not None:
+            return MemoryStore(base=open_store(JSON_CACHE))
+        return MemoryStore()
+    if path.isdir(location):
+        return JsonCacheDirectory(location)
+    if location.endswith(SQLITE_EXTENSIONS):
+        from .srd_sqlite import SQLiteJsonCache
+
+        return SQLiteJsonCache(location)
+    if not path.exists(location):
+        in_archive = find_zip_archive(location)
+        if in_archive is not None:
+            return ZipJsonCache(*in_archive)
+        if not path.splitext(location)[1]:
+            LOG.info(f"Creating directory {location}")
+            makedirs(location)
+            return JsonCacheDirectory(location)
+    elif zipfile.is_zipfile(location):
+        return ZipJsonCache(location)
+    return PackedJsonCache(location)
@@ -0,0 +1,100 @@
+"""
+Command-line tools for building alternative formats of the SRD json_cache
+"""
+import argparse
+from .srd_store import (
+    ZIP_COMPRESSION,
+    build_snapshot,
+    gzip_json_cache,
+    pack_json_cache,
+    zip_json_cache,
+)
+from .srd_sqlite import build_sqlite
+from .srd_client import warm_cache, sync_directory
+from .SRD import JSON_CACHE
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="dnd_character.srd_tools",
+        description="build alternative formats of the SRD json_cache",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    pack = commands.add_parser("pack", help="pack a json_cache into a single file")
+    pack.add_argument("directory", help="json_cache directory to read")
+    pack.add_argument("destination", help="packed file to write")
+    zip_ = commands.add_parser("zip", help="copy a json_cache into a zip archive")
+    zip_.add_argument("directory", help="json_cache directory to read")
+    zip_.add_argument("destination", help="zip archive to write")
+    zip_.add_argument("--compression", choices=ZIP_COMPRESSION, default="deflated")
+    gzip_ = commands.add_parser("gzip", help="gzip each document of a json_cache")
+    gzip_.add_argument("directory", help="json_cache directory to read")
+    gzip_.add_argument(
+        "destination", nargs="?", help="directory to write (default: in place)"
+    )
+    sqlite = commands.add_parser("sqlite", help="copy a json_cache into SQLite")
+    sqlite.add_argument("directory", help="json_cache directory to read")
+    sqlite.add_argument("destination", help="database file to write")
+    warm = commands.add_parser(
+        "warm", help="fetch SRD documents from DND_SRD_API into the cache"
+    )
+    warm.add_argument(
+        "uris",
+        nargs="*",
+        help="uris to fetch (default: every cached uri, which are skipped"
+        " without --refresh, or everything from /api/ if the cache is empty)",
+    )
+    warm.add_argument(
+        "--refresh",
+        action="store_true",
+        help="fetch documents again even if they are already cached",
+    )
+    warm.add_argument(
+        "--follow", action="store_true", help="also fetch every referenced uri"
+    )
+    warm.add_argument("--concurrency", type=int, default=8)
+    snapshot = commands.add_parser(
+        "snapshot",
+        help="pre-parse a json_cache into a snapshot loaded by DND_SRD_EAGER=1",
+    )
+    snapshot.add_argument("directory", nargs="?", default=JSON_CACHE)
+    sync = commands.add_parser(
+        "sync", help="download changed documents from DND_SRD_API into a json_cache"
+    )
+    sync.add_argument("directory", nargs="?", default=JSON_CACHE)
+    sync.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    if args.command == "pack":
+        num = pack_json_cache(args.directory, args.destination)
+        print(f"Packed {num} documents into {args.destination}")
+    elif args.command == "zip":
+        num = zip_json_cache(args.directory, args.destination, args.compression)
+        print(f"Zipped {num} documents into {args.destination}")
+    elif args.command == "gzip":
+        num = gzip_json_cache(args.directory, args.destination)
+        print(f"Compressed {num} documents into {args.destination or args.directory}")
+    elif args.command == "sqlite":
+        num = build_sqlite(args.directory, args.destination)
+        print(f"Copied {num} documents into {args.destination}")
+    elif args.command == "warm":
+        fetched = warm_cache(
+            args.uris or None,
+            refresh=args.refresh,
+            follow=args.follow,
+            concurrency=args.concurrency,
+        )
+        print(f"Fetched {len(fetched)} documents")
+    elif args.command == "snapshot":
+        num = build_snapshot(args.directory)
+        print(f"Saved a snapshot of {num} documents in {args.directory}")
+    elif args.command == "sync":
+        report = sync_directory(args.directory, concurrency=args.concurrency)
+        print(
+            f"{len(report.changed)} changed, {len(report.unchanged)} unchanged, "
+            f"{len(report.not_found)} not found"
+        )
+
+
+if __name__ == "__main__":
+    main()
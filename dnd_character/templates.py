@@ -0,0 +1,176 @@
+"""
+Immutable templates of what a class gives a character, built once and cloned
+
+A ClassTemplate holds the data which Character's classs setter copies from
+a class: proficiencies, saving throws, starting equipment, etc.
+A LevelTemplate holds the data which apply_class_level copies from the class
+levels up to a level: class features, proficiency bonus, etc.
+Templates of the SRD classes are cached (12 classes x 20 levels);
+templates of custom classes are built each time.
+"""
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional, TYPE_CHECKING
+from .SRD import SRD_class_levels, JsonData
+from .equipment import SRD_equipment
+from .srd_graph import class_levels, class_proficiencies, equipment_category_names
+
+if TYPE_CHECKING:
+    from .classes import _CLASS
+
+
+# full name of the ability score used for spellcasting
+SPELLCASTING_ABILITY = {"wis": "wisdom", "cha": "charisma", "int": "intelligence"}
+
+
+@dataclass(frozen=True, slots=True)
+class LevelTemplate:
+    level: int
+    # (index, document) of every class feature gained up to this level, in order
+    class_features: tuple[tuple[str, JsonData], ...]
+    # None if no class level up to this one sets the value
+    prof_bonus: Optional[int]
+    ability_score_bonus: Optional[int]
+
+
+@dataclass(frozen=True, slots=True)
+class ClassTemplate:
+    class_name: str
+    class_index: str
+    hit_die: int
+    spellcasting_stat: Optional[str]
+    # (index, name, type) of each proficiency
+    proficiencies: tuple[tuple[str, str, str], ...]
+    saving_throws: tuple[str, ...]
+    # (SRD equipment document, quantity) of each item of starting equipment
+    starting_equipment: tuple[tuple[JsonData, int], ...]
+    # descriptions of the optional starting equipment, for `player_options`
+    starting_equipment_options: tuple[str, ...]
+
+
+def build_level_templates(
+    class_index: Optional[str], levels: list[JsonData]
+) -> tuple[LevelTemplate, ...]:
+    templates = []
+    class_features: tuple[tuple[str, JsonData], ...] = ()
+    prof_bonus = ability_score_bonus = None
+    for class_level in class_levels(class_index, levels):
+        data = class_level.data
+        prof_bonus = data.get("prof_bonus", prof_bonus)
+        ability_score_bonus = data.get("ability_score_bonuses", ability_score_bonus)
+        class_features += class_level.features
+        templates.append(
+            LevelTemplate(
+                class_level.level, class_features, prof_bonus, ability_score_bonus
+            )
+        )
+    return tuple(templates)
+
+
+@lru_cache(maxsize=None)
+def srd_level_templates(class_index: str) -> tuple[LevelTemplate, ...]:
+    return build_level_templates(class_index, SRD_class_levels[class_index])
+
+
+def level_template(
+    class_index: Optional[str], levels: list[JsonData], level: int
+) -> Optional[LevelTemplate]:
+    """
+    Template of everything gained from `levels` (the class levels of class_index)
+    up to `level`, or None if no level is gained
+    """
+    if levels is SRD_class_levels.get(class_index):
+        templates = srd_level_templates(class_index)
+    else:
+        templates = build_level_templates(class_index, levels)
+    if 0 < level <= len(templates) and templates[level - 1].level == level:
+        # the SRD has one document per level, in order
+        return templates[level - 1]
+    result = None
+    for template in templates:
+        if template.level > level:
+            break
+        result = template
+    return result
+
+
+def starting_equipment_options(classs: "_CLASS") -> tuple[str, ...]:
+    """Describe each optional choice of starting equipment for a class"""
+    options_strings = []
+
+    def fetch_choices_string(option: dict[str, dict[str, str]]) -> str:
+        choices_names = equipment_category_names(option["equipment_category"]["url"])
+        return "{} (choice from {})".format(
+            option["equipment_category"]["name"], ", ".join(choices_names)
+        )
+
+    for item_option in classs.starting_equipment_options:
+        options = []
+        opts = item_option["from"]
+        if "options" not in opts.keys():
+            options_strings.append(fetch_choices_string(opts))
+
+        else:
+            for opt in opts["options"]:
+                opt_type = opt["option_type"]
+                if opt_type == "counted_reference":
+                    options.append("{} x {}".format(opt["count"], opt["of"]["name"]))
+                elif opt_type == "choice":
+                    how_many = opt["choice"]["choose"]
+                    choices = fetch_choices_string(opt["choice"]["from"])
+                    options.append("{} x {}".format(how_many, choices))
+                elif opt_type == "multiple":
+                    try:
+                        combo = [
+                            str(c["count"]) + " " + c["of"]["name"]
+                            for c in opt["items"]
+                        ]
+                        options_strings.append("{}".format(", ".join(combo)))
+                    except KeyError:
+                        # shield or martial weapon
+                        martial_weapons = fetch_choices_string(
+                            opt["items"][0]["choice"]["from"]
+                        )
+                        shield = opt["items"][1]["of"]["name"]
+                        options_strings.append(
+                            "choose 1 from {} or a {}".format(martial_weapons, shield)
+                        )
+                        continue
+
+            options_strings.append("choose from {}".format(", ".join(options)))
+    return tuple(options_strings)
+
+
+def build_class_template(classs: "_CLASS") -> ClassTemplate:
+    return ClassTemplate(
+        classs.name,
+        classs.index,
+        classs.hit_die,
+        SPELLCASTING_ABILITY[classs.spellcasting["spellcasting_ability"]["index"]]
+        if classs.spellcasting
+        else None,
+        class_proficiencies(classs),
+        tuple(saving_throw["name"] for saving_throw in classs.saving_throws),
+        tuple(
+            (SRD_equipment[item["equipment"]["index"]], item["quantity"])
+            for item in classs.starting_equipment
+        ),
+        starting_equipment_options(classs),
+    )
+
+
+@lru_cache(maxsize=None)
+def srd_class_template(class_index: str) -> ClassTemplate:
+    from .classes import CLASSES
+
+    return build_class_template(CLASSES[class_index])
+
+
+def class_template(classs: "_CLASS") -> ClassTemplate:
+    """Template of everything a new character gets from `classs`"""
+    from .classes import CLASSES
+
+    srd_class = CLASSES.get(classs.index)
+    if srd_class is not None and (srd_class is classs or srd_class == classs):
+        return srd_class_template(classs.index)
+    return build_class_template(classs)
@@ -0,0 +1,144 @@
+"""
+A lazy view of a saved character, which is only constructed when needed
+
+    views = [CharacterView(data) for data in saved_characters]
+    names = [(view.name, view.current_hp) for view in views]
+
+Reading a key of dict(character) from a view (e.g. `view.name`) doesn't
+construct the character: Character(**data) sets up the class, gives each item
+and applies the class levels, which is wasted when only a few values are read.
+Dicts and lists (e.g. `view.conditions`) are the exception, since they may be
+changed in place: they are read from the constructed character, so changes
+to them aren't made to the saved dict, or lost.
+The inventory and experience are converted on first access: changes to the
+items are kept when the character is constructed, and setting the experience
+sets it on the character. Anything else (methods, properties which aren't
+saved, etc.) is read from a Character constructed from the dict the first time
+it's needed, and assigning an attr constructs it too: from then on, the view
+reads the character.
+"""
+from typing import Any, Iterator
+from uuid import UUID
+from .character import Character
+from .equipment import _Item
+from .experience import Experience, level_at_experience
+from .serialization import shallow_dict
+
+
+class ExperienceView(Experience):
+    """The experience of a CharacterView, which is set on its character"""
+
+    @property
+    def experience(self) -> "ExperienceView":
+        return self
+
+    @experience.setter
+    def experience(self, new_val: int) -> None:
+        # self.character is the view, which constructs the character
+        self.character.experience = int(new_val)
+
+
+class CharacterView:
+    def __init__(self, data: dict[str, Any]) -> None:
+        """`data` is a dict made by dict(character), which must not be modified"""
+        object.__setattr__(self, "_data", data)
+        object.__setattr__(self, "_character", None)
+        object.__setattr__(self, "_items", None)
+
+    @property
+    def character(self) -> Character:
+        """The character, constructed from the dict on first access"""
+        if self._character is None:
+            object.__setattr__(self, "_character", self._construct())
+        return self._character
+
+    def _construct(self) -> Character:
+        # the character changes its dicts and lists in place (e.g. when leveling
+        # up), so it's given copies to leave the dict of the view unmodified
+        data = {
+            key: value.copy() if isinstance(value, (dict, list)) else value
+            for key, value in self._data.items()
+        }
+        if self._items is None:
+            return Character(**data)
+        data["inventory"] = [shallow_dict(item) for item in self._items]
+        character = Character(**data)
+        if [item.uid for item in character._inventory] == [
+            item.uid for item in self._items
+        ]:
+            # the items returned by view.inventory stay the character's items
+            character._inventory = self._items
+        return character
+
+    def _dict(self) -> dict[str, Any]:
+        """dict(character) before it is constructed"""
+        if self._items is None:
+            return self._data
+        return {**self._data, "inventory": [dict(item) for item in self._items]}
+
+    @property
+    def loaded(self) -> bool:
+        """True if the character has been constructed"""
+        return self._character is not None
+
+    def __getattr__(self, name: str) -> Any:
+        # only called for attrs which aren't properties of this class
+        if self._character is None and name in self._data and name[0] != "_":
+            value = self._data[name]
+            if not isinstance(value, (dict, list)):
+                return value
+        return getattr(self.character, name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        setattr(self.character, name, value)
+
+    @property
+    def uid(self) -> UUID:
+        if self._character is not None:
+            return self._character.uid
+        uid = self._data["uid"]
+        return uid if isinstance(uid, UUID) else UUID(uid)
+
+    @property
+    def level(self) -> int:
+        if self._character is not None:
+            return self._character.level
+        # dict(character) doesn't save a custom level: it's set by the experience
+        return level_at_experience(self._data["experience"])
+
+    @property
+    def experience(self) -> Experience:
+        if self._character is not None:
+            return self._character.experience
+        return ExperienceView(self, self._data["experience"], update_level=False)
+
+    @property
+    def inventory(self) -> list[_Item]:
+        if self._character is not None:
+            return self._character.inventory
+        if self._items is None:
+            items = [_Item(**item) for item in self._data["inventory"]]
+            object.__setattr__(self, "_items", items)
+        return self._items
+
+    def __iter__(self) -> Iterator[tuple[str, Any]]:
+        """Enables `dict(view)`, which is the same as dict(view.character)"""
+        if self._character is not None:
+            return iter(self._character)
+        return iter(self._dict().items())
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, CharacterView):
+            other = other._dict() if other._character is None else other._character
+        if self._character is not None:
+            return self._character == other
+        data = self._dict()
+        if isinstance(other, Character):
+            return other == data
+        return data == other or self.character == other
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self._data!r})"
+
+    def __str__(self) -> str:
+        return str(self.character)
@@ -53,3 +53,26 @@ def test_all_12_classes():
     assert warlock.classs == CLASSES["warlock"]
     wizard = Wizard()
     assert wizard.classs == CLASSES["wizard"]
+
+
+def test_class_templates_are_cloned():
+    from dataclasses import replace
+    from dnd_character.templates import class_template, level_template
+
+    assert class_template(CLASSES["paladin"]) is class_template(CLASSES["paladin"])
+    first, second = Paladin(), Paladin()
+    assert first.inventory[0] is not second.inventory[0]
+    first.player_options["starting_equipment"].clear()
+    assert second.player_options["starting_equipment"] == list(
+        class_template(CLASSES["paladin"]).starting_equipment_options
+    )
+
+    template = level_template("wizard", Wizard()._class_levels, 5)
+    assert template.level == 5
+    assert dict(template.class_features).keys() == Wizard(level=5).class_features.keys()
+
+    # custom classes aren't cached
+    custom = replace(CLASSES["paladin"], saving_throws=[{"name": "DEX"}])
+    assert class_template(custom).saving_throws == ("DEX",)
+    assert Character(classs=custom).saving_throws == ["DEX"]
+    assert Paladin().saving_throws == ["WIS", "CHA"]
@@ -1,6 +1,6 @@
 from ast import literal_eval
 import pytest
-from dnd_character.equipment import Item, SRD_equipment
+from dnd_character.equipment import Item, SRD_equipment, equipment_by_category
 
 
 def test_all_items_instantiation():
@@ -351,3 +351,9 @@ def test_item_serialization(item_name: str, expected_value: dict):
 def test_item_function_deserializes_dict():
     torch = Item("torch")
     assert Item(dict(torch)) == torch
+
+
+def test_equipment_by_category():
+    armor = equipment_by_category("armor")
+    assert "chain-mail" in armor
+    assert "torch" not in armor
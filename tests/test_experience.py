@@ -1,5 +1,6 @@
 from dnd_character import Character
 from dnd_character.experience import experience_at_level, Experience
+from dnd_character.classes import Bard
 
 
 def twenty_levels_of_character():
@@ -104,3 +105,18 @@ def test_experience_setter_object():
 def test_cast_experience_to_int():
     character = Character(experience=100)
     assert int(character.experience) == 100
+
+
+def test_class_levels_applied_once_initialized(monkeypatch):
+    calls = []
+    apply_class_level = Character.apply_class_level
+    monkeypatch.setattr(
+        Character,
+        "apply_class_level",
+        lambda self: calls.append(self.level) or apply_class_level(self),
+    )
+    character = Bard(level=5)
+    assert calls == [5]
+    calls.clear()
+    assert Character(**dict(character)) == character
+    assert calls == [5]
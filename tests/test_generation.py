@@ -0,0 +1,65 @@
+import pickle
+import random
+from dnd_character import srd_graph, templates
+from dnd_character.character import Character
+from dnd_character.classes import CLASSES
+from dnd_character.generation import generate_characters
+
+
+def test_generate_characters_reproducible():
+    characters = [
+        dict(character)
+        for character in generate_characters(20, seed=5, workers=1, chunksize=3)
+    ]
+    assert len(characters) == 20
+    assert len({character["uid"] for character in characters}) == 20
+    assert characters == [
+        dict(character)
+        for character in generate_characters(20, seed=5, workers=2, chunksize=7)
+    ]
+    assert characters != [
+        dict(character) for character in generate_characters(20, seed=6, workers=1)
+    ]
+
+
+def test_generate_characters_options():
+    random.seed(1)
+    characters = list(
+        generate_characters(
+            12, classes=["bard", CLASSES["wizard"]], level=(3, 5), workers=1, name="X"
+        )
+    )
+    for character in characters:
+        assert character.classs in (CLASSES["bard"], CLASSES["wizard"])
+        assert 3 <= character.level <= 5
+        assert character.name == "X"
+        assert Character(**dict(character)) == character
+    # without a seed, the seed comes from `random`
+    random.seed(1)
+    assert [dict(character) for character in characters] == [
+        dict(character)
+        for character in generate_characters(
+            12, classes=["bard", "wizard"], level=(3, 5), workers=1, name="X"
+        )
+    ]
+
+
+def test_pickle_srd_class():
+    assert pickle.loads(pickle.dumps(CLASSES["bard"])) is CLASSES["bard"]
+
+
+def test_unpickled_character_levels_up_from_srd_templates(monkeypatch):
+    Character(classs=CLASSES["cleric"], level=20)
+    cleric = pickle.loads(pickle.dumps(Character(classs=CLASSES["cleric"], level=1)))
+
+    def rebuild(*args):
+        raise AssertionError("the class levels were resolved again")
+
+    # only class levels which aren't from the SRD are resolved on each level up
+    monkeypatch.setattr(templates, "build_level_templates", rebuild)
+    monkeypatch.setattr(srd_graph, "resolve_class_levels", rebuild)
+    cleric.experience = 355000
+    assert cleric.level == 20
+    assert cleric.class_features == (
+        Character(classs=CLASSES["cleric"], level=20).class_features
+    )
@@ -0,0 +1,47 @@
+import io
+import pytest
+from dnd_character import Bard, Wizard
+from dnd_character.character import Character
+from dnd_character.equipment import Item
+from dnd_character.jsonl import read_characters, read_dicts, write_characters
+from dnd_character.spellcasting import SPELLS
+
+
+def roster() -> list[Character]:
+    wizard = Wizard(level=5)
+    wizard.cantrips_known.append(SPELLS["light"])
+    bard = Bard(level=2)
+    bard.give_item(Item("flute"))
+    return [wizard, bard, Character(name="Canary")]
+
+
+def test_write_and_read_characters(tmp_path):
+    characters = roster()
+    for name, compact in (("roster.jsonl", False), ("roster.jsonl.gz", True)):
+        path = tmp_path / name
+        assert write_characters(characters, path, compact) == 3
+        assert [dict(character) for character in read_characters(path)] == [
+            dict(character) for character in characters
+        ]
+
+
+def test_read_characters_in_workers(tmp_path):
+    characters = roster()
+    write_characters(characters, tmp_path / "roster.jsonl")
+    loaded = read_characters(tmp_path / "roster.jsonl", workers=2, chunksize=2)
+    assert [dict(character) for character in loaded] == [
+        dict(character) for character in characters
+    ]
+
+
+def test_read_dicts_from_stream():
+    stream = io.StringIO()
+    write_characters([dict(character) for character in roster()], stream)
+    stream.seek(0)
+    assert [data["name"] for data in read_dicts(stream)] == [None, None, "Canary"]
+
+
+def test_invalid_line_number():
+    stream = io.StringIO('{"name": "Canary"}\n\n{"name": \n')
+    with pytest.raises(ValueError, match="Line 3"):
+        list(read_dicts(stream))
@@ -1,4 +1,4 @@
-from dnd_character.monsters import Monster, SRD_monsters
+from dnd_character.monsters import Monster, SRD_monsters, monsters_by_challenge_rating
 
 
 def test_all_monsters_instantiation():
@@ -84,3 +84,11 @@ def test_zombie_serialization():
 def test_monster_function_deserializes_dict():
     roper = Monster("roper")
     assert Monster(dict(roper)) == roper
+
+
+def test_monsters_by_challenge_rating():
+    monsters = monsters_by_challenge_rating(2, 4)
+    assert "ogre" in monsters
+    assert "zombie" not in monsters
+    for monster in monsters:
+        assert 2 <= SRD_monsters[monster]["challenge_rating"] <= 4
@@ -0,0 +1,67 @@
+from dnd_character import Bard, Fighter
+from dnd_character.character import Character
+from dnd_character.equipment import Item
+from dnd_character.roster import Roster
+
+
+def test_roster_round_trip():
+    characters = [Bard(level=3), Fighter(level=7), Character(level=5, experience=100)]
+    characters[0].conditions["prone"] = True
+    data = [dict(character) for character in characters]
+    roster = Roster(characters)
+    assert len(roster) == 3
+    assert [dict(character) for character in roster.characters()] == data
+    assert roster[2].level == 5
+    assert all(character.patch() == {} for character in roster)
+
+
+def test_roster_damage_and_heal():
+    bard = Bard(level=4)
+    roster = Roster([bard, Fighter(level=4)])
+    max_hp = bard.max_hp
+    assert roster.damage([0], amount=3) == [3]
+    assert roster[0].current_hp == max_hp - 3
+    assert bard.patch() == {"current_hp": max_hp - 3}
+    rolled = roster.damage(d6=2)
+    assert all(2 <= damage <= 12 for damage in rolled)
+    assert roster[1].current_hp == max(roster[1].max_hp - rolled[1], 0)
+    roster.damage(amount=1000)
+    assert all(character.current_hp == 0 for character in roster)
+    roster.heal(amount=1000)
+    assert all(character.current_hp == character.max_hp for character in roster)
+
+
+def test_roster_conditions():
+    roster = Roster([Bard(), Bard(), Bard()])
+    roster.set_condition("prone", True, [0, 2])
+    assert roster.with_condition("prone") == [0, 2]
+    assert roster[0].conditions["prone"]
+    assert roster[0].patch() == {"conditions": roster[0].conditions}
+    roster.set_condition("prone", False)
+    assert roster.with_condition("prone") == []
+    assert not roster[2].conditions["prone"]
+
+
+def test_roster_mean_and_update():
+    characters = [Fighter(level=2), Fighter(level=4)]
+    roster = Roster(characters)
+    assert roster.mean("level") == 3
+    assert roster.mean("level", [1]) == 4
+    characters[0].give_item(Item("shield"))
+    roster.update(0)
+    assert roster.columns["armor_class"][0] == characters[0].armor_class
+    assert roster[0].armor_class == characters[0].armor_class
+
+
+def test_roster_level_follows_experience():
+    roster = Roster([Bard(level=3)])
+    roster.columns["level"][0] = 10
+    assert roster[0].level == 3
+    assert roster[0].patch() == {}
+    assert roster.columns["level"][0] == 3
+    roster.columns["experience"][0] = 85000
+    bard = roster[0]
+    assert bard.level == 11
+    assert bard.patch()["experience"] == 85000
+    assert roster.columns["level"][0] == 11
+    assert roster.columns["max_hp"][0] == bard.max_hp
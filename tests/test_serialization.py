@@ -1,5 +1,15 @@
-from dnd_character import Character, Bard, Monk, CLASSES
+from dnd_character import Character, Bard, Monk, Wizard, CLASSES
 from dnd_character.equipment import Item
+from dnd_character.monsters import Monster
+from dnd_character.serialization import (
+    apply_patch,
+    compact_dict,
+    fingerprint,
+    from_compact_dict,
+    to_dict,
+    to_json,
+)
+from dnd_character.spellcasting import SPELLS
 from ast import literal_eval
 import json
 
@@ -170,3 +180,134 @@ def test_character_json_monk_with_items():
     c = Monk()
     c.give_item(Item("dagger"))
     assert json.loads(json.dumps(dict(c))) == dict(c)
+
+
+def test_compact_dict_refers_to_srd():
+    wizard = Wizard(level=5)
+    wizard.cantrips_known.append(SPELLS["light"])
+    wizard.give_item(Item("torch"))
+    wizard.inventory[-1].quantity = 3
+    data = json.loads(json.dumps(compact_dict(wizard)))
+    assert data["cantrips_known"] == ["light"]
+    assert data["inventory"][-1] == {
+        "index": "torch",
+        "uid": wizard.inventory[-1].uid,
+        "quantity": 3,
+    }
+    assert set(data["class_features"].values()) == {None}
+    assert set(data["proficiencies"].values()) == {None}
+    assert len(json.dumps(data)) * 3 < len(json.dumps(dict(wizard)))
+    assert dict(from_compact_dict(data)) == dict(wizard)
+
+
+def test_compact_dict_keeps_custom_documents():
+    bard = Bard()
+    flute = dict(Item("flute"))
+    flute["index"] = "magic-flute"
+    bard.give_item(Item(flute))
+    bard.class_features["homebrew"] = {"name": "Homebrew"}
+    bard.proficiencies["flute"] = {"name": "Flute", "type": "Magic"}
+    data = json.loads(json.dumps(compact_dict(bard)))
+    assert data["inventory"][-1] == json.loads(json.dumps(flute))
+    assert data["class_features"]["homebrew"] == {"name": "Homebrew"}
+    assert data["proficiencies"]["flute"] == {"name": "Flute", "type": "Magic"}
+    # loaded like the full dict
+    assert dict(from_compact_dict(data)) == dict(Character(**dict(bard)))
+
+
+def test_to_dict_equals_dict():
+    wizard = Wizard(level=5)
+    wizard.cantrips_known.append(SPELLS["light"])
+    for obj in (wizard, Item("torch"), SPELLS["light"], Monster("aboleth")):
+        assert to_dict(obj) == dict(obj)
+    assert list(to_dict(wizard)) == list(dict(wizard))
+
+
+def test_to_json_equals_json_dumps():
+    wizard = Wizard(level=5)
+    wizard.cantrips_known.append(SPELLS["light"])
+    assert to_json(wizard) == json.dumps(dict(wizard))
+    # changed and custom documents are not taken from the SRD
+    wizard.class_features["spellcasting-wizard"] = {"name": "Changed"}
+    wizard.class_features["homebrew"] = {"name": "Homebrew"}
+    wizard.cantrips_known.maximum += 1
+    wizard.cantrips_known.append(dict(SPELLS["light"], name="Dark"))
+    assert to_json(wizard) == json.dumps(dict(wizard))
+    assert to_json(wizard, indent=2) == json.dumps(dict(wizard), indent=2)
+
+
+def test_new_character_is_unchanged():
+    assert Bard(level=3).patch() == {}
+    assert Character(**dict(Wizard(level=5))).patch() == {}
+
+
+def test_patch_contains_changed_keys():
+    wizard = Wizard(level=5, dexterity=10)
+    saved = dict(wizard)
+    wizard.current_hp -= 3
+    wizard.change_wealth(gp=-1)
+    wizard.give_item(Item("torch"))
+    wizard.spells_prepared.append(SPELLS["identify"])
+    wizard.conditions["prone"] = True
+    wizard.mark_changed("conditions")
+    patch = wizard.patch()
+    assert set(patch) == {
+        "current_hp",
+        "wealth",
+        "wealth_detailed",
+        "inventory",
+        "spells_prepared",
+        "conditions",
+    }
+    assert apply_patch(saved, patch) == dict(wizard)
+    wizard.clear_changes()
+    assert wizard.patch() == {}
+    # the snapshot doesn't grow each time changes are cleared
+    wizard.clear_changes()
+    assert not any(key.startswith("_") for key in wizard._saved_attrs)
+
+
+def test_patch_after_level_up():
+    bard = Bard(level=1)
+    saved = dict(bard)
+    bard.experience += 900
+    patch = bard.patch()
+    assert {"experience", "max_hp", "class_features", "spell_slots"} <= set(patch)
+    assert "name" not in patch
+    assert apply_patch(saved, patch) == dict(bard)
+
+
+def test_character_dunder_eq_with_json_dict():
+    wizard = Wizard(level=5)
+    wizard.cantrips_known.append(SPELLS["light"])
+    assert wizard == json.loads(json.dumps(dict(wizard)))
+    assert wizard == Character(**dict(wizard))
+    data = dict(wizard)
+    data["cantrips_known"] = []
+    assert wizard != data
+
+
+def test_fingerprint_of_equal_characters():
+    wizard = Wizard(level=5)
+    wizard.cantrips_known.append(SPELLS["light"])
+    data = dict(wizard)
+    reordered = {key: data[key] for key in reversed(data)}
+    assert (
+        fingerprint(wizard)
+        == fingerprint(data)
+        == fingerprint(reordered)
+        == fingerprint(json.loads(json.dumps(data)))
+        == fingerprint(Character(**data))
+    )
+    assert fingerprint(Item("torch")) == fingerprint(dict(Item("torch")))
+
+
+def test_fingerprint_changes_with_character():
+    wizard = Wizard(level=5)
+    before = fingerprint(wizard)
+    wizard.give_item(Item("torch"))
+    assert fingerprint(wizard) != before
+    wizard.remove_item(wizard.inventory[-1])
+    assert fingerprint(wizard) == before
+    wizard.class_features["homebrew"] = {"name": "Homebrew"}
+    assert fingerprint(wizard) != before
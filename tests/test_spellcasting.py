@@ -1,5 +1,6 @@
 import pytest
 from ast import literal_eval
+from dnd_character.SRD import SRD
 from dnd_character.character import Character
 from dnd_character.classes import CLASSES, Bard, Wizard, Ranger
 from dnd_character.spellcasting import spells_for_class_level, SPELLS, _SPELL
@@ -25,6 +26,21 @@ def test_cantrips_wizard():
     assert sorted(spells_for_class_level("wizard", 0)) == sorted(expected_cantrips)
 
 
+class QueryStore:
+    """A store with secondary indexes, like the SQLite store"""
+
+    def query(self, endpoint, **filters):
+        return []
+
+
+@pytest.mark.parametrize("indexed", [False, True])
+def test_spells_for_unknown_class(monkeypatch, indexed):
+    if indexed:
+        monkeypatch.setattr(SRD, "store", QueryStore())
+    with pytest.raises(KeyError):
+        spells_for_class_level("necromancer", 1)
+
+
 def test_spell_slots_bard():
     assert Bard().spell_slots == {
         "spell_slots_level_1": 2,
@@ -0,0 +1,415 @@
+import contextlib
+import dataclasses
+import gc
+import marshal
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import shutil
+import subprocess
+import sys
+import zipfile
+import pytest
+from dnd_character.SRD import (
+    SRD,
+    SRDIndex,
+    DecoratedAPICallable,
+    LRUCache,
+    JSON_CACHE,
+    approximate_size,
+    SRD_class_levels,
+)
+from dnd_character.classes import CLASSES
+from dnd_character.srd_graph import class_levels, class_proficiencies
+from dnd_character.srd_shared import preload_srd
+from dnd_character.srd_sqlite import SQLiteJsonCache, build_sqlite
+from dnd_character.srd_store import (
+    JsonCacheDirectory,
+    MemoryStore,
+    SNAPSHOT_FILENAME,
+    SNAPSHOT_HEADER,
+    ZipJsonCache,
+    build_snapshot,
+    gzip_json_cache,
+    json_cache_signature,
+    load_snapshot,
+    PackedJsonCache,
+    open_store,
+    pack_json_cache,
+    zip_json_cache,
+)
+
+
+URIS = ["/api/spells/fireball", "/api/equipment/torch", "/api/monsters/zombie"]
+
+
+def offline_api(uri):
+    raise AssertionError(f"Unexpected API request for {uri}")
+
+
+@pytest.fixture
+def small_cache(tmp_path):
+    for uri in URIS:
+        filename = f"{uri[1:].replace('/', '_')}.json"
+        shutil.copy(f"{JSON_CACHE}/{filename}", tmp_path / filename)
+    return tmp_path
+
+
+def test_store_is_indexed_without_parsing(small_cache):
+    srd = DecoratedAPICallable(offline_api, JsonCacheDirectory(str(small_cache)))
+    assert sorted(srd.store) == sorted(URIS)
+    assert srd.cache == {}
+    assert srd("/api/spells/fireball")["name"] == "Fireball"
+    assert list(srd.cache) == ["/api/spells/fireball"]
+
+
+def test_load_all(small_cache):
+    srd = DecoratedAPICallable(offline_api, JsonCacheDirectory(str(small_cache)))
+    srd.load_all()
+    assert sorted(srd.cache) == sorted(URIS)
+
+
+def test_corrupt_file_removed_by_another_process(small_cache, monkeypatch):
+    torch = small_cache / "api_equipment_torch.json"
+    torch.write_text('{"name": "To')
+    store = JsonCacheDirectory(str(small_cache))
+    lock = store.lock
+
+    @contextlib.contextmanager
+    def lock_after_removal():
+        # another process removes the corrupt file before this one gets the lock
+        torch.unlink(missing_ok=True)
+        with lock():
+            yield
+
+    monkeypatch.setattr(store, "lock", lock_after_removal)
+    with pytest.raises(KeyError):
+        store.load("/api/equipment/torch")
+    assert "/api/equipment/torch" not in store
+
+
+def test_corrupt_file_is_fetched_again(small_cache):
+    (small_cache / "api_equipment_torch.json").write_text('{"name": "To')
+    srd = DecoratedAPICallable(
+        lambda uri: {"name": "Torch"}, JsonCacheDirectory(str(small_cache))
+    )
+    assert srd("/api/equipment/torch") == {"name": "Torch"}
+    # the response replaced the corrupt file
+    assert JsonCacheDirectory(str(small_cache)).load("/api/equipment/torch") == {
+        "name": "Torch"
+    }
+
+
+def test_packed_store(small_cache, tmp_path):
+    packed = str(tmp_path / "srd.pack")
+    assert pack_json_cache(str(small_cache), packed) == len(URIS)
+    store = open_store(packed)
+    assert isinstance(store, PackedJsonCache)
+    for uri in URIS:
+        assert store.load(uri) == JsonCacheDirectory(str(small_cache)).load(uri)
+    with pytest.raises(KeyError):
+        store.load("/api/spells/wish")
+
+
+def test_sqlite_store(small_cache, tmp_path):
+    database = str(tmp_path / "srd.sqlite")
+    assert build_sqlite(str(small_cache), database) == len(URIS)
+    store = open_store(database)
+    assert isinstance(store, SQLiteJsonCache)
+    assert sorted(store) == sorted(URIS)
+    assert store.load("/api/monsters/zombie")["name"] == "Zombie"
+    assert store.query("spells", level=3, classs="wizard") == ["fireball"]
+    assert store.query("spells", level=3, classs="cleric") == []
+    assert store.query("monsters", min_challenge_rating=0, max_challenge_rating=1)
+    assert store.query("equipment", equipment_category="adventuring-gear") == ["torch"]
+
+
+def test_missing_sqlite_store(tmp_path):
+    database = tmp_path / "missing.sqlite"
+    with pytest.raises(FileNotFoundError):
+        open_store(str(database))
+    assert not database.exists()
+
+
+def test_srd_index_loads_documents_on_access():
+    monsters = SRDIndex("monsters")
+    assert len(monsters) == 334
+    assert "zombie" in monsters
+    assert "tarrasque" in monsters
+    assert monsters["zombie"] is SRD("/api/monsters/zombie")
+    spells = SRDIndex("spells", lambda spell: spell["name"])
+    assert spells["fireball"] == "Fireball"
+    assert list(spells._values) == ["fireball"]
+
+
+def test_lazy_module_globals():
+    from dnd_character import SRD as SRD_module, spellcasting
+
+    assert "Adventuring" in SRD_module.SRD_rules
+    assert "fireball" in spellcasting.spell_names_by_class["wizard"]
+    assert "fireball" in spellcasting.spell_names_by_level[3]
+    with pytest.raises(AttributeError):
+        spellcasting.spell_names_by_school
+
+
+def test_lru_cache_evicts_least_recently_used(small_cache):
+    srd = DecoratedAPICallable(
+        offline_api, JsonCacheDirectory(str(small_cache)), LRUCache(maxsize=2)
+    )
+    srd("/api/spells/fireball")
+    srd("/api/equipment/torch")
+    srd("/api/spells/fireball")
+    srd("/api/monsters/zombie")
+    assert list(srd.cache) == ["/api/spells/fireball", "/api/monsters/zombie"]
+    info = srd.cache_info()
+    assert (info.hits, info.misses, info.evictions) == (1, 3, 1)
+    assert info.currsize == 2
+    # evicted documents are loaded from the store again
+    assert srd("/api/equipment/torch")["name"] == "Torch"
+
+
+def test_lru_cache_memory_limit(small_cache):
+    zombie = JsonCacheDirectory(str(small_cache)).load("/api/monsters/zombie")
+    cache = LRUCache(maxbytes=approximate_size(zombie) + 1)
+    srd = DecoratedAPICallable(offline_api, JsonCacheDirectory(str(small_cache)), cache)
+    srd("/api/monsters/zombie")
+    assert cache.nbytes == approximate_size(zombie)
+    srd("/api/spells/fireball")
+    assert list(cache) == ["/api/spells/fireball"]
+    assert cache.nbytes <= cache.maxbytes
+    assert cache.cache_info().evictions == 1
+
+
+def test_single_flight_cache_misses(small_cache):
+    calls = []
+    release = threading.Event()
+
+    def slow_api(uri):
+        calls.append(uri)
+        release.wait(timeout=5)
+        return {"name": "Wish"}
+
+    srd = DecoratedAPICallable(slow_api, JsonCacheDirectory(str(small_cache)))
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = [pool.submit(srd, "/api/spells/wish") for _ in range(8)]
+        time.sleep(0.05)
+        release.set()
+        assert [result.result() for result in results] == [{"name": "Wish"}] * 8
+    assert calls == ["/api/spells/wish"]
+    assert JsonCacheDirectory(str(small_cache)).load("/api/spells/wish") == {
+        "name": "Wish"
+    }
+
+
+class LateCache(LRUCache):
+    """Misses the first lookup, as if another thread loaded the uri just after"""
+
+    def __getitem__(self, uri):
+        if not self.misses:
+            self.misses += 1
+            raise KeyError(uri)
+        return super().__getitem__(uri)
+
+
+def test_single_flight_rechecks_cache(small_cache):
+    cache = LateCache()
+    cache["/api/spells/wish"] = {"name": "Wish"}
+    srd = DecoratedAPICallable(offline_api, MemoryStore(), cache)
+    assert srd("/api/spells/wish") == {"name": "Wish"}
+
+
+def test_single_flight_shares_errors(small_cache):
+    def broken_api(uri):
+        time.sleep(0.05)
+        raise ConnectionError("API is down")
+
+    srd = DecoratedAPICallable(broken_api, JsonCacheDirectory(str(small_cache)))
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = [pool.submit(srd, "/api/spells/wish") for _ in range(4)]
+        for result in results:
+            with pytest.raises(ConnectionError):
+                result.result()
+    assert srd._in_flight == {}
+
+
+def test_snapshot(small_cache):
+    assert build_snapshot(str(small_cache)) == len(URIS)
+    documents = load_snapshot(str(small_cache))
+    assert documents == {
+        uri: JsonCacheDirectory(str(small_cache)).load(uri) for uri in URIS
+    }
+    srd = DecoratedAPICallable(offline_api, JsonCacheDirectory(str(small_cache)))
+    assert srd.load_snapshot()
+    assert sorted(srd.cache) == sorted(URIS)
+
+
+def test_snapshot_content_hash(small_cache):
+    build_snapshot(str(small_cache))
+    torch = small_cache / "api_equipment_torch.json"
+    # the same content with a new modification time is still valid
+    torch.write_text(torch.read_text())
+    assert load_snapshot(str(small_cache)) is not None
+    # and the snapshot is given the new signature
+    data = (small_cache / SNAPSHOT_FILENAME).read_bytes()
+    (header_length,) = SNAPSHOT_HEADER.unpack_from(data)
+    header = marshal.loads(
+        data[SNAPSHOT_HEADER.size : SNAPSHOT_HEADER.size + header_length]
+    )
+    assert header[3] == json_cache_signature(str(small_cache))
+    assert load_snapshot(str(small_cache)) is not None
+    torch.write_text('{"name": "Torch"}')
+    assert load_snapshot(str(small_cache)) is None
+    srd = DecoratedAPICallable(offline_api, JsonCacheDirectory(str(small_cache)))
+    assert not srd.load_snapshot()
+    assert srd("/api/equipment/torch") == {"name": "Torch"}
+
+
+def test_zip_store(small_cache, tmp_path):
+    archive = str(tmp_path / "srd.zip")
+    assert zip_json_cache(str(small_cache), archive) == len(URIS)
+    store = open_store(archive)
+    assert isinstance(store, ZipJsonCache)
+    assert sorted(store) == sorted(URIS)
+    assert store.load("/api/spells/fireball")["name"] == "Fireball"
+    with pytest.raises(KeyError):
+        store.load("/api/spells/wish")
+    with pytest.raises(NotImplementedError):
+        store.save("/api/spells/wish", {})
+
+
+def test_store_inside_zip_archive(small_cache, tmp_path):
+    archive = tmp_path / "app.pyz"
+    with zipfile.ZipFile(archive, "w") as f:
+        for uri in URIS:
+            filename = f"{uri[1:].replace('/', '_')}.json"
+            f.write(small_cache / filename, f"dnd_character/json_cache/{filename}")
+    store = open_store(str(archive / "dnd_character" / "json_cache"))
+    assert isinstance(store, ZipJsonCache)
+    assert sorted(store) == sorted(URIS)
+    srd = DecoratedAPICallable(offline_api, store)
+    assert srd("/api/monsters/zombie")["name"] == "Zombie"
+
+
+def test_memory_store():
+    store = open_store(":memory:")
+    assert isinstance(store, MemoryStore)
+    assert store.load("/api/spells/fireball") == SRD("/api/spells/fireball")
+    assert len(store) == len(JsonCacheDirectory(JSON_CACHE))
+    srd = DecoratedAPICallable(lambda uri: {"name": "Homebrew"}, store)
+    assert srd("/api/spells/homebrew") == {"name": "Homebrew"}
+    assert store.load("/api/spells/homebrew") == {"name": "Homebrew"}
+    assert "/api/spells/homebrew" in store
+    assert "/api/spells/homebrew" not in JsonCacheDirectory(JSON_CACHE)
+
+
+def test_empty_store_variable_is_unset():
+    # DND_SRD_STORE= uses the packaged json_cache, like an unset variable
+    env = {**os.environ, "DND_SRD_STORE": ""}
+    result = subprocess.run(
+        [sys.executable, "-c", "from dnd_character.SRD import SRD; print(SRD.store)"],
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stderr
+    assert "JsonCacheDirectory" in result.stdout
+
+
+def test_new_store_directory(tmp_path):
+    store = open_store(str(tmp_path / "cache" / "json_cache"))
+    assert isinstance(store, JsonCacheDirectory)
+    assert not store.readonly
+    assert len(store) == 0
+
+
+def test_readonly_directory(small_cache):
+    small_cache.chmod(0o555)
+    try:
+        store = JsonCacheDirectory(str(small_cache))
+        if not store.readonly:
+            pytest.skip("directory permissions are not enforced for this user")
+        srd = DecoratedAPICallable(lambda uri: {"name": "Wish"}, store)
+        assert srd("/api/spells/wish") == {"name": "Wish"}
+        assert "/api/spells/wish" not in store
+    finally:
+        small_cache.chmod(0o755)
+
+
+def test_gzipped_store(small_cache, tmp_path):
+    compressed = tmp_path / "compressed"
+    assert gzip_json_cache(str(small_cache), str(compressed)) == len(URIS)
+    assert sorted(name for name in os.listdir(compressed) if name != ".lock") == sorted(
+        f"{uri[1:].replace('/', '_')}.json.gz" for uri in URIS
+    )
+    store = open_store(str(compressed))
+    assert store.compress
+    for uri in URIS:
+        assert store.load(uri) == JsonCacheDirectory(str(small_cache)).load(uri)
+    srd = DecoratedAPICallable(lambda uri: {"name": "Wish"}, store)
+    assert srd("/api/spells/wish") == {"name": "Wish"}
+    assert (compressed / "api_spells_wish.json.gz").exists()
+
+    # compressing in place replaces the uncompressed files
+    gzip_json_cache(str(small_cache))
+    assert not list(small_cache.glob("*.json"))
+    assert len(JsonCacheDirectory(str(small_cache))) == len(URIS)
+
+
+def test_corrupt_gzipped_file_is_fetched_again(small_cache):
+    gzip_json_cache(str(small_cache))
+    (small_cache / "api_equipment_torch.json.gz").write_bytes(b"\x1f\x8b\x08\x00")
+    srd = DecoratedAPICallable(
+        lambda uri: {"name": "Torch"}, JsonCacheDirectory(str(small_cache))
+    )
+    assert srd("/api/equipment/torch") == {"name": "Torch"}
+    assert JsonCacheDirectory(str(small_cache)).load("/api/equipment/torch") == {
+        "name": "Torch"
+    }
+
+
+@pytest.mark.parametrize("compression", ["stored", "deflated", "lzma"])
+def test_compressed_zip_store(small_cache, tmp_path, compression):
+    archive = str(tmp_path / "srd.zip")
+    zip_json_cache(str(small_cache), archive, compression)
+    store = open_store(archive)
+    for uri in URIS:
+        assert store.load(uri) == JsonCacheDirectory(str(small_cache)).load(uri)
+
+
+def cached_uris(_):
+    return sorted(SRD.cache)
+
+
+@pytest.mark.skipif(
+    "fork" not in multiprocessing.get_all_start_methods(), reason="needs fork"
+)
+def test_preload_srd(small_cache, monkeypatch):
+    monkeypatch.setattr(SRD, "store", JsonCacheDirectory(str(small_cache)))
+    monkeypatch.setattr(SRD, "cache", LRUCache())
+    try:
+        preload_srd()
+        assert sorted(SRD.cache) == sorted(URIS)
+        # forked workers inherit the parsed documents
+        with multiprocessing.get_context("fork").Pool(2) as pool:
+            assert pool.map(cached_uris, range(2)) == [sorted(URIS)] * 2
+    finally:
+        gc.unfreeze()
+
+
+def test_resolved_class_graph():
+    wizard_levels = class_levels("wizard", SRD_class_levels["wizard"])
+    assert wizard_levels is class_levels("wizard", SRD_class_levels["wizard"])
+    assert [level.level for level in wizard_levels] == list(range(1, 21))
+    for index, feature in wizard_levels[0].features:
+        # the same document, unless DND_SRD_CACHE_SIZE evicted it
+        assert feature == SRD(f"/api/features/{index}")
+    assert ("daggers", "Daggers", "Weapons") in class_proficiencies(CLASSES["wizard"])
+
+    # a custom class is resolved without being cached
+    custom = dataclasses.replace(
+        CLASSES["wizard"], proficiencies=[CLASSES["wizard"].proficiencies[0]]
+    )
+    assert len(class_proficiencies(custom)) == 1
+    assert len(class_proficiencies(CLASSES["wizard"])) > 1
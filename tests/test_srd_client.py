@@ -0,0 +1,142 @@
+import asyncio
+import hashlib
+import os
+import shutil
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from dnd_character.SRD import SRD, JSON_CACHE
+from dnd_character.srd_client import (
+    AsyncSRDClient,
+    SRDRequestError,
+    MANIFEST_FILENAME,
+    referenced_uris,
+    sync_directory,
+    warm_store,
+)
+from dnd_character.srd_store import JsonCacheDirectory
+
+
+class StandInSRDHandler(BaseHTTPRequestHandler):
+    """Serves documents from the json_cache like the SRD API would"""
+
+    protocol_version = "HTTP/1.1"
+    failures: dict[str, int] = {}
+    requests: list[str] = []
+
+    def do_GET(self):
+        self.requests.append(self.path)
+        if self.failures.get(self.path, 0) > 0:
+            self.failures[self.path] -= 1
+            self.send_response(503)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if self.path not in SRD.store:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = json.dumps(SRD.store.load(self.path)).encode()
+        etag = f'"{hashlib.md5(body).hexdigest()}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def api_url():
+    StandInSRDHandler.failures = {}
+    StandInSRDHandler.requests = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInSRDHandler)
+    thread = threading.Thread(
+        target=server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True
+    )
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_fetch_all(api_url):
+    uris = ["/api/spells/fireball", "/api/monsters/zombie", "/api/equipment/torch"]
+
+    async def fetch():
+        async with AsyncSRDClient(api_url, concurrency=2) as client:
+            return await client.fetch_all(uris)
+
+    documents = asyncio.run(fetch())
+    assert documents == {uri: SRD(uri) for uri in uris}
+
+
+def test_retries_with_backoff(api_url):
+    StandInSRDHandler.failures = {"/api/spells/fireball": 2}
+
+    async def fetch(retries):
+        async with AsyncSRDClient(api_url, retries=retries, backoff=0) as client:
+            return await client.fetch_json("/api/spells/fireball")
+
+    with pytest.raises(SRDRequestError):
+        asyncio.run(fetch(retries=1))
+    StandInSRDHandler.failures = {"/api/spells/fireball": 2}
+    assert asyncio.run(fetch(retries=2))["name"] == "Fireball"
+
+
+def test_warm_store(api_url, tmp_path):
+    store = JsonCacheDirectory(str(tmp_path))
+    store.save("/api/spells/fireball", {"name": "Outdated Fireball"})
+
+    async def warm(refresh):
+        async with AsyncSRDClient(api_url) as client:
+            return await warm_store(
+                store,
+                ["/api/spells/fireball", "/api/classes/wizard"],
+                refresh=refresh,
+                client=client,
+            )
+
+    assert asyncio.run(warm(refresh=False)) == ["/api/classes/wizard"]
+    assert store.load("/api/spells/fireball") == {"name": "Outdated Fireball"}
+    assert sorted(asyncio.run(warm(refresh=True))) == [
+        "/api/classes/wizard",
+        "/api/spells/fireball",
+    ]
+    assert store.load("/api/spells/fireball") == SRD("/api/spells/fireball")
+
+
+def test_referenced_uris():
+    uris = set(referenced_uris(SRD("/api/classes/wizard")))
+    assert "/api/classes/wizard/levels" in uris
+    assert "/api/proficiencies/daggers" in uris
+
+
+def test_sync_directory(api_url, tmp_path):
+    for filename in ("api_spells_fireball.json", "api_classes_wizard.json"):
+        shutil.copy(os.path.join(JSON_CACHE, filename), tmp_path / filename)
+    store = JsonCacheDirectory(str(tmp_path))
+    store.save("/api/spells/fireball", {"name": "Outdated Fireball"})
+
+    report = sync_directory(str(tmp_path), base_url=api_url)
+    assert report.changed == ["/api/spells/fireball"]
+    assert report.unchanged == ["/api/classes/wizard"]
+    assert store.load("/api/spells/fireball") == SRD("/api/spells/fireball")
+    assert (tmp_path / MANIFEST_FILENAME).exists()
+    # no leftover temporary files
+    assert not [name for name in os.listdir(tmp_path) if name.startswith(".tmp_")]
+
+    # the second sync uses the ETags from the manifest
+    report = sync_directory(str(tmp_path), base_url=api_url)
+    assert report.changed == []
+    assert sorted(report.unchanged) == ["/api/classes/wizard", "/api/spells/fireball"]
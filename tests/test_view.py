@@ -0,0 +1,89 @@
+import copy
+import json
+from dnd_character import Bard, Wizard
+from dnd_character.character import Character
+from dnd_character.equipment import Item
+from dnd_character.spellcasting import SPELLS
+from dnd_character.view import CharacterView
+
+
+def test_view_reads_dict_without_constructing():
+    bard = Bard(level=4, name="Canary")
+    bard.give_item(Item("flute"))
+    data = json.loads(json.dumps(dict(bard)))
+    view = CharacterView(data)
+    assert view.name == "Canary"
+    assert view.current_hp == bard.current_hp
+    assert view.level == 4
+    assert view.uid == bard.uid
+    assert view.experience.to_next_level == bard.experience.to_next_level
+    assert view.inventory == bard.inventory
+    assert not view.loaded
+    assert dict(view) == data
+
+
+def test_view_constructs_character_when_needed():
+    wizard = Wizard(level=3)
+    wizard.cantrips_known.append(SPELLS["light"])
+    view = CharacterView(dict(wizard))
+    assert view.base_armor_class == wizard.base_armor_class
+    assert view.loaded
+    assert view == wizard
+    assert view.character == wizard
+
+
+def test_view_assignment_changes_character():
+    view = CharacterView(dict(Character(level=2)))
+    view.current_hp = 1
+    assert view.loaded
+    assert view.current_hp == 1
+    assert dict(view)["current_hp"] == 1
+    assert view.character.patch() == {"current_hp": 1}
+
+
+def test_view_keeps_changed_items():
+    bard = Bard(level=3)
+    bard.give_item(Item("flute"))
+    view = CharacterView(dict(bard))
+    flute = view.inventory[-1]
+    flute.quantity = 99
+    assert dict(view)["inventory"][-1]["quantity"] == 99
+    view.current_hp = 1
+    assert view.inventory[-1] is flute
+    assert dict(view)["inventory"][-1]["quantity"] == 99
+
+
+def test_view_experience_is_set_on_character():
+    view = CharacterView(dict(Bard(level=5)))
+    view.experience.experience = 100000
+    assert view.loaded
+    assert view.level == 12
+    assert dict(view)["experience"] == 100000
+
+
+def test_view_doesnt_modify_dict():
+    wizard = Wizard(level=3)
+    data = dict(wizard)
+    saved = copy.deepcopy(data)
+    view = CharacterView(data)
+    view.experience += 100000
+    assert view.level == 12
+    assert data == saved
+    assert CharacterView(data) == wizard
+
+
+def test_view_mutable_values_are_the_characters():
+    data = dict(Bard(level=2))
+    view = CharacterView(data)
+    view.conditions["prone"] = True
+    assert view.loaded
+    assert not data["conditions"]["prone"]
+    assert dict(view)["conditions"]["prone"]
+
+
+def test_character_equals_view():
+    bard = Bard(level=2)
+    view = CharacterView(dict(bard))
+    assert view == bard
+    assert bard == view
+    assert bard != CharacterView(dict(Bard(level=2)))